@@ -5,48 +5,12 @@ Created on Wed Dec 11 13:51:41 2024
 @author: CC.Cheng
 """
 
-def char_to_hex(char):
-    """Convert a hexadecimal character to its integer value."""
-    if '0' <= char <= '9':
-        return ord(char) - ord('0')
-    elif 'A' <= char <= 'F':
-        return ord(char) - ord('A') + 10
-    elif 'a' <= char <= 'f':
-        return ord(char) - ord('a') + 10
-    else:
-        raise ValueError(f"Illegal character: {char}")
+from crc16 import crc16_hex
 
 
 def calculate_crc16(data: str, poly: int = 0x1021, init: int = 0x1021):
-    """Calculate CRC16 based on the logic in the provided C code."""
-    crc = init
-    is_high_nibble = True
-    current_byte = 0
-
-    for char in data:
-        if char.isspace():
-            continue  # Skip spaces or newline characters
-
-        nibble = char_to_hex(char)
-
-        if is_high_nibble:
-            current_byte = nibble << 4
-            is_high_nibble = False
-        else:
-            current_byte |= nibble
-            is_high_nibble = True
-
-            # Process each bit of the byte
-            for _ in range(8):
-                msb = (crc >> 15) & 1
-                input_bit = (current_byte >> 7) & 1
-                current_byte = (current_byte << 1) & 0xFF
-                if msb ^ input_bit:
-                    crc = ((crc << 1) ^ poly) & 0xFFFF
-                else:
-                    crc = (crc << 1) & 0xFFFF
-
-    return crc
+    """Calculate CRC16 of a hex string (spaces and newlines are ignored)."""
+    return crc16_hex(data, init, poly)
 
 
 # Example usage
@@ -9,86 +9,277 @@ import time
 from array import array
 import xml.etree.ElementTree as ET
 import logging
-from aardvark_py import *
 import os
 
+from i2c_batch import OP_WRITE, OP_READ, FLAG_NOSTOP, read_batch
+from i2c_transport import AardvarkTransport
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 
+class RegisterSession:
+    """
+    Queued register writes for one AardvarkController, run together by
+    commit(): the writes go out in order, a write that continues where the
+    previous one ended joining it in one burst, then all touched registers
+    are checked with one read_block per contiguous range. A register written
+    more than once is checked against its last value. With the controller's
+    shadow cache on, a write whose every byte the device already holds is
+    skipped; any other write is sent whole.
+
+        with aardvark.session() as regs:
+            regs.write(0x4A, [0xFC, 0x07, 0x00])
+            regs.write(0x0C, [0x00, 0xB8], verify=False)  # self-clearing
+    """
+
+    def __init__(self, controller, verify=True):
+        self.controller = controller
+        self.verify = verify
+        self.writes = []
+        self.mismatches = {}
+
+    def write(self, register, data, verify=True):
+        """
+        Queue data for register onward. verify=False leaves it out of the
+        read-back and the shadow cache, so it is always sent.
+        """
+        self.writes.append((register & 0xFF, bytes(data), verify))
+
+    @staticmethod
+    def expected(writes):
+        """{register: value} a list of queued writes should leave behind."""
+        values = {}
+        for register, data, verify in writes:
+            for i, value in enumerate(data):
+                if verify:
+                    values[(register + i) & 0xFF] = value
+                else:
+                    values.pop((register + i) & 0xFF, None)
+        return values
+
+    @staticmethod
+    def ranges(registers):
+        """(start, length) of every run of consecutive registers."""
+        runs = []
+        for register in sorted(registers):
+            if runs and register == runs[-1][0] + runs[-1][1]:
+                runs[-1][1] += 1
+            else:
+                runs.append([register, 1])
+        return [(start, length) for start, length in runs]
+
+    def bursts(self, writes):
+        """[register, data] transactions for a list of queued writes, after the shadow cache and coalescing."""
+        controller = self.controller
+        state = dict(controller.shadow) if controller.shadow is not None else None
+        bursts = []
+        for register, data, verify in writes:
+            if state is not None:
+                if verify and controller.holds(register, data, state):
+                    continue
+                controller.shadow_store(register, data, state, cache=verify)
+            if bursts and (bursts[-1][0] + len(bursts[-1][1])) & 0xFF == register:
+                bursts[-1][1] += data
+            else:
+                bursts.append([register, bytearray(data)])
+        return bursts
+
+    def commit(self):
+        """
+        Run the queued writes and verify them. Returns {register: (expected, read)}
+        for every register that did not read back as written (empty when all is well).
+        Stops at the first failed write and returns None.
+        """
+        controller = self.controller
+        if controller.handle is None:
+            raise RuntimeError("Aardvark device is not open.")
+
+        writes, self.writes = self.writes, []
+        self.mismatches = {}
+        bursts = self.bursts(writes)
+        for register, data in bursts:
+            num_written = controller.transport.write(controller.i2c_address, bytes([register]) + data)
+            if num_written != len(data) + 1:
+                logger.error(f"Error writing to register {hex(register)}: wrote {num_written} of {len(data) + 1} bytes")
+                controller.invalidate_shadow()
+                return None
+        if controller.shadow is not None:
+            for register, data, verify in writes:
+                controller.shadow_store(register, data, cache=verify)
+
+        expected = self.expected(writes) if self.verify else {}
+        ranges = self.ranges(expected)
+        for start, length in ranges:
+            data_in = controller.read_block(start, length)
+            for i in range(length):
+                value = data_in[i] if data_in is not None and i < len(data_in) else None
+                if value != expected[start + i]:
+                    self.mismatches[start + i] = (expected[start + i], value)
+
+        if self.mismatches:
+            for register, (value, read) in sorted(self.mismatches.items()):
+                read = "nothing" if read is None else hex(read)
+                logger.warning(f"[WARNING] Register {hex(register)} reads {read}, expected {hex(value)}")
+        logger.info(f"Session sent {len(bursts)} writes for {len(writes)} queued, verified {len(expected)} registers "
+                    f"with {len(ranges)} reads, {len(self.mismatches)} mismatches")
+        return self.mismatches
+
+    def discard(self):
+        self.writes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+
 class AardvarkController:
-    def __init__(self, i2c_address, bitrate=400):
+    def __init__(self, i2c_address, bitrate=400, transport=None, shadow=False, volatile=()):
+        """
+        transport: an i2c_transport.I2CTransport, e.g. SimulatedTransport; defaults to the Aardvark on port 0.
+        shadow: keep a cache of the register values written (and read with
+        read_block(cache=True)), and skip writes the device already holds.
+        volatile: registers that are always written and never cached
+        (commands, self-clearing bits).
+        """
         self.i2c_address = i2c_address
         self.bitrate = bitrate
-        self.handle = None
+        self.transport = transport if transport is not None else AardvarkTransport(bitrate)
+        # register -> value the device is known to hold, or None when the cache is off
+        self.shadow = {} if shadow else None
+        self.volatile = set(volatile)
+
+    @property
+    def handle(self):
+        """The open transport, or None (kept for scripts that check aardvark.handle)."""
+        return self.transport if self.transport.is_open else None
 
     def open(self):
         """Open the Aardvark device."""
-        self.handle = aa_open(0)
-        if self.handle <= 0:
-            raise RuntimeError("Error: Unable to open Aardvark device.")
+        self.invalidate_shadow()
+        self.transport.bitrate = self.bitrate
+        self.transport.open()
         print("Aardvark opened successfully!")
-        self.configure()
+        print(f"Aardvark configured with I2C Bitrate: {self.transport.bitrate} kHz")
 
     def configure(self):
         """Configure the Aardvark for I2C communication."""
-        aa_configure(self.handle, AA_CONFIG_SPI_I2C)
-        aa_i2c_bitrate(self.handle, self.bitrate)
-        aa_i2c_pullup(self.handle, AA_I2C_PULLUP_BOTH)
-        aa_target_power(self.handle, AA_TARGET_POWER_BOTH)
-        print(f"Aardvark configured with I2C Bitrate: {self.bitrate} kHz")
+        self.transport.bitrate = self.bitrate
+        self.transport.configure()
+        print(f"Aardvark configured with I2C Bitrate: {self.transport.bitrate} kHz")
 
     def close(self):
         """Close the Aardvark device."""
+        self.invalidate_shadow()
         if self.handle is not None:
-            aa_close(self.handle)
-            self.handle = None
+            self.transport.close()
             print("Aardvark closed.")
 
+    def invalidate_shadow(self, registers=None):
+        """
+        Forget the cached values of registers (all of them by default). Call it
+        after a power cycle or reset, or anything else that changes the device
+        behind the controller's back.
+        """
+        if self.shadow is None:
+            return
+        if registers is None:
+            self.shadow.clear()
+        else:
+            for register in registers:
+                self.shadow.pop(register & 0xFF, None)
+
+    def holds(self, register, data, state=None):
+        """True if the device is known to hold every byte of data at register onward (never for volatile registers)."""
+        state = self.shadow if state is None else state
+        return all((register + i) & 0xFF not in self.volatile and state.get((register + i) & 0xFF) == value
+                   for i, value in enumerate(data))
+
+    def shadow_store(self, register, data, state=None, cache=True):
+        """Record data as written to register onward (cache=False forgets those registers instead)."""
+        state = self.shadow if state is None else state
+        if state is None:
+            return
+        for i, value in enumerate(data):
+            reg = (register + i) & 0xFF
+            if cache and reg not in self.volatile:
+                state[reg] = value
+            else:
+                state.pop(reg, None)
+
     def basic_write(self, register, data):
         """Write data to a specific register."""
         if self.handle is None:
             raise RuntimeError("Aardvark device is not open.")
 
+        # Skip the write only if the device holds all of it; a partial match is
+        # still sent whole (multi-byte registers such as the VCO trim are written atomically)
+        if self.shadow is not None and self.holds(register, data):
+            logger.debug(f"Skipped write of {[hex(b) for b in data]} to register {hex(register)}, already set")
+            return
+
         # Ensure data is formatted correctly as a list of unsigned bytes
         data_out = array('B', [register & 0xFF] + data)  # Convert to an array of bytes
 
         # Send data to the I2C slave
-        num_written = aa_i2c_write(self.handle, self.i2c_address, AA_I2C_NO_FLAGS, data_out)
+        num_written = self.transport.write(self.i2c_address, data_out)
 
         if num_written < 0:
             logger.error(f"Error writing to register {hex(register)}: {num_written}")
+            self.invalidate_shadow(range(register, register + len(data)))
         elif num_written != len(data_out):
             logger.warning(f"Warning: Expected to write {len(data_out)} bytes, but only wrote {num_written}.")
+            self.invalidate_shadow(range(register, register + len(data)))
         else:
             logger.info(f"Successfully wrote {[hex(b) for b in data]} to register {hex(register)}")
-
-    def read_register(self, register, length):
-        """Read data from a specific register."""
+            self.shadow_store(register, data)
+
+    def read_block(self, register, length, cache=False):
+        """
+        Read length bytes from register onward in one combined transaction
+        (register pointer write, repeated start, read). Returns bytes, or None on error.
+        cache=True stores a complete read in the shadow cache; leave it off for
+        status and counter registers, which change on their own.
+        """
         if self.handle is None:
             raise RuntimeError("Aardvark device is not open.")
 
-        # Convert register to a properly formatted list of bytes
-        register_address = array('B', [register & 0xFF])  # Ensure it's a list of unsigned bytes
-
-        # Send register address to the I2C slave
-        num_written = aa_i2c_write(self.handle, self.i2c_address, AA_I2C_NO_FLAGS, register_address)
-
-        if num_written < 0:
-            logger.error(f"Error sending register address {hex(register)}: {num_written}")
-            return None
-        elif num_written != len(register_address):
-            logger.warning(f"Warning: Expected to write {len(register_address)} bytes, but only wrote {num_written}.")
-
-        # Read requested number of bytes
-        num_read, data_in = aa_i2c_read(self.handle, self.i2c_address, AA_I2C_NO_FLAGS, length)
+        num_read, data_in = self.transport.write_read(self.i2c_address, [register & 0xFF], length)
 
         if num_read < 0:
             logger.error(f"Error reading from register {hex(register)}: {num_read}")
             return None
         elif num_read != length:
             logger.warning(f"Warning: Expected to read {length} bytes, but only read {num_read}.")
+        elif cache:
+            self.shadow_store(register, data_in)
+        return data_in
+
+    def dump_registers(self, start=0x00, length=0x100, block_size=0x100):
+        """
+        Read the register window start..start+length-1 with one read_block per
+        block_size bytes. Returns the window as bytes, or None on error.
+        """
+        dump = bytearray()
+        for offset in range(0, length, block_size):
+            data_in = self.read_block(start + offset, min(block_size, length - offset))
+            if data_in is None:
+                return None
+            dump += data_in
+        logger.info(f"Dumped {len(dump)} bytes from register {hex(start)}")
+        return bytes(dump)
+
+    def read_register(self, register, length):
+        """Read data from a specific register."""
+        data_in = self.read_block(register, length)
+        if data_in is None:
+            return None
 
         # Convert data to hex format
         data_list = [hex(byte) for byte in data_in]
@@ -126,91 +317,160 @@ class AardvarkController:
         else:
             logger.info(f"Write successful! Register {hex(register)} changed from {before_write} to {after_write}")
 
-    def execute_batch_file(self, filename):
-        """Execute I2C batch commands from an XML file."""
+    def session(self, verify=True):
+        """Start a RegisterSession: queue writes, then run and verify them in bulk on commit()."""
+        return RegisterSession(self, verify)
+
+    def burst(self):
+        """A RegisterSession without read-back: queued writes go out coalesced into bursts on exit."""
+        return RegisterSession(self, verify=False)
+
+    def replay_batch_file(self, filename, address=None):
+        """
+        Replay an Aardvark batch XML in document order: each <i2c_write> goes
+        out as one I2C transaction of its whole payload, <i2c_read> reads and
+        logs count bytes and <sleep> waits. address overrides the slave address
+        of every command; by default the XML's addr is used.
+        Stops at the first failed write; returns True if the whole batch ran.
+        """
         if self.handle is None:
             logger.error("Aardvark device is not open.")
             raise RuntimeError("Aardvark device is not open.")
 
         if not os.path.exists(filename):
             logger.error(f"Batch file '{filename}' not found.")
-            return
-
+            return False
+
+        # The batch may write anything: drop the shadow cache
+        self.invalidate_shadow()
+        writes = 0
+        reads = 0
+        bytes_written = 0
+        # <sleep> nested inside an <i2c_write> runs after the write
+        pending_sleep_ms = 0
+        in_write = False
+        start_time = time.perf_counter()
         try:
-            # Parse XML file
-            tree = ET.parse(filename)
-            root = tree.getroot()
-
-            for command in root.findall("i2c_write"):
-                addr = int(command.get("addr"), 16)  # Convert device address to int
-                count = int(command.get("count"))  # Number of bytes in the command
-                radix = int(command.get("radix"))  # Radix (base of the numbers, e.g., base 16 for hex)
-
-                # Extract data as a list of integers
-                data_list = [int(byte, radix) for byte in command.text.strip().split()]
-
-                # Check if we have enough bytes (first byte is register address, rest are values)
-                if len(data_list) < 2:
-                    logger.error(f"Invalid data format in batch file: {data_list}")
+            for event, command in ET.iterparse(filename, events=("start", "end")):
+                if event == "start":
+                    in_write = in_write or command.tag == "i2c_write"
                     continue
 
-                # First byte is the register start address
-                start_register = data_list[0]
-                values = data_list[1:]  # Remaining bytes are data to write
-
-                # Write each value to consecutive registers
-                for i, value in enumerate(values):
-                    current_register = start_register + i  # Increment register address
-                    self.basic_write(current_register, [value])
-                    # logger.warning(f"Wrote {hex(value)} to register {hex(current_register)}")
+                if command.tag == "i2c_write":
+                    in_write = False
+                    addr = address if address is not None else int(command.get("addr"), 16)
+                    radix = int(command.get("radix", "16"))
+                    text = command.text or ""
+                    if radix == 16:
+                        data_out = array('B', bytes.fromhex(text))
+                    else:
+                        data_out = array('B', [int(byte, radix) for byte in text.split()])
+                    if not data_out:
+                        logger.error(f"Empty <i2c_write> to {hex(addr)} in batch file, skipped.")
+                    else:
+                        num_written = self.transport.write(addr, data_out, command.get("nostop", "0") == "1")
+                        if num_written != len(data_out):
+                            logger.error(f"Write {writes} to {hex(addr)} failed: wrote {num_written} of {len(data_out)} bytes")
+                            return False
+                        logger.debug(f"Wrote {len(data_out)} bytes to {hex(addr)}")
+                        writes += 1
+                        bytes_written += num_written
+                    if pending_sleep_ms:
+                        self.transport.delay(pending_sleep_ms)
+                        pending_sleep_ms = 0
+                elif command.tag == "i2c_read":
+                    addr = address if address is not None else int(command.get("addr"), 16)
+                    length = int(command.get("count"))
+                    num_read, data_in = self.transport.read(addr, length)
+                    if num_read < 0:
+                        logger.error(f"Error reading from {hex(addr)}: {num_read}")
+                    else:
+                        logger.debug(f"Read {[hex(b) for b in data_in[:num_read]]} from {hex(addr)}")
+                        reads += 1
+                elif command.tag == "sleep":
+                    if in_write:
+                        pending_sleep_ms += float(command.get("ms"))
+                    else:
+                        self.transport.delay(float(command.get("ms")))
+                else:
+                    continue
+                command.clear()
 
         except ET.ParseError:
             logger.error(f"Error parsing XML file '{filename}'.")
+            return False
+        except ValueError as e:
+            logger.error(f"Invalid command in batch file '{filename}': {e}")
+            return False
         except Exception as e:
+            # I/O or transport failure part way through (file unreadable, adapter unplugged)
             logger.error(f"Unexpected error processing batch file: {str(e)}")
+            return False
+
+        elapsed = time.perf_counter() - start_time
+        rate = bytes_written / elapsed / 1024 if elapsed else 0.0
+        logger.info(f"Replayed {writes} writes ({bytes_written} bytes) and {reads} reads from '{filename}' "
+                    f"in {elapsed:.3f} s, {rate:.1f} KB/s")
+        return True
+
+    def execute_batch_file(self, filename):
+        """Execute I2C batch commands from an XML file on this controller's slave address."""
+        return self.replay_batch_file(filename, self.i2c_address)
 
     def execute_MTP_batch_file(self, filename):
-        """Execute I2C batch commands from an XML file."""
+        """Execute an MTP batch XML from modify_binary_file (DDC2BI packets to their own address, 0x37)."""
+        return self.replay_batch_file(filename)
+
+    def execute_binary_batch_file(self, filename):
+        """
+        Replay a binary batch file (.i2cb, written by modify_binary_file with sidecar=1).
+        The file is memory-mapped and each write goes out as one I2C transaction.
+        Stops at the first failed write; returns True if the whole batch ran.
+        """
         if self.handle is None:
             logger.error("Aardvark device is not open.")
             raise RuntimeError("Aardvark device is not open.")
 
         if not os.path.exists(filename):
             logger.error(f"Batch file '{filename}' not found.")
-            return
-
+            return False
+
+        # The batch may write anything: drop the shadow cache
+        self.invalidate_shadow()
+        writes = 0
+        reads = 0
+        bytes_written = 0
+        start_time = time.perf_counter()
         try:
-            # Parse XML file
-            tree = ET.parse(filename)
-            root = tree.getroot()
-
-            for command in root.findall("i2c_write"):
-                addr = int(command.get("addr"), 16)  # Convert device address to int
-                count = int(command.get("count"))  # Number of bytes in the command
-                radix = int(command.get("radix"))  # Radix (base of the numbers, e.g., base 16 for hex)
-
-                # Extract data as a list of integers
-                data_list = [int(byte, radix) for byte in command.text.strip().split()]
-
-                # Check if we have enough bytes (first byte is register address, rest are values)
-                if len(data_list) < 2:
-                    logger.error(f"Invalid data format in batch file: {data_list}")
-                    continue
-
-                # First byte is the register start address
-                start_register = 0x37
-                values = data_list[0:]  # Remaining bytes are data to write
-
-                # Write each value to consecutive registers
-                for i, value in enumerate(values):
-                    current_register = start_register + i  # Increment register address
-                    self.basic_write(current_register, [value])
-                    # logger.warning(f"Wrote {hex(value)} to register {hex(current_register)}")
-
-        except ET.ParseError:
-            logger.error(f"Error parsing XML file '{filename}'.")
+            for op, addr, flags, arg in read_batch(filename):
+                if op == OP_WRITE:
+                    num_written = self.transport.write(addr, arg, bool(flags & FLAG_NOSTOP))
+                    if num_written != len(arg):
+                        logger.error(f"Write {writes} to {hex(addr)} failed: wrote {num_written} of {len(arg)} bytes")
+                        return False
+                    writes += 1
+                    bytes_written += num_written
+                elif op == OP_READ:
+                    num_read, data_in = self.transport.read(addr, arg)
+                    if num_read < 0:
+                        logger.error(f"Error reading from {hex(addr)}: {num_read}")
+                    else:
+                        logger.debug(f"Read {[hex(b) for b in data_in[:num_read]]} from {hex(addr)}")
+                        reads += 1
+                else:
+                    self.transport.delay(arg)
+        except ValueError as e:
+            logger.error(f"Error parsing binary batch file '{filename}': {e}")
+            return False
         except Exception as e:
             logger.error(f"Unexpected error processing batch file: {str(e)}")
+            return False
+
+        elapsed = time.perf_counter() - start_time
+        rate = bytes_written / elapsed / 1024 if elapsed else 0.0
+        logger.info(f"Replayed {writes} writes ({bytes_written} bytes) and {reads} reads from '{filename}' "
+                    f"in {elapsed:.3f} s, {rate:.1f} KB/s")
+        return True
 
     def __del__(self):
         """Destructor to ensure the Aardvark device is closed properly."""
@@ -230,8 +490,37 @@ class AardvarkController:
 # # Read 2 bytes from register 0x44
 # data = aardvark.read_register(0x44, 2)
 
+# # Shadow cache: repeated writes of the same values are skipped; forget them after a power cycle
+# aardvark = AardvarkController(i2c_address=0x10, bitrate=400, shadow=True, volatile=[0x0C])
+# aardvark.invalidate_shadow()
+
+# # Queue writes and verify them all at the end with block reads
+# with aardvark.session() as regs:
+#     regs.write(0x4A, [0xFC, 0x07, 0x00])
+#     regs.write(0x54, [0xFC, 0x07, 0x00])
+#     regs.write(0x0C, [0x00, 0xB8], verify=False)
+
+# # Read registers 0x40 ~ 0x4F as bytes, or dump the whole 256-register map
+# block = aardvark.read_block(0x40, 16)
+# regmap = aardvark.dump_registers()
+
 # # Execute a batch command file
 # aardvark.execute_batch_file(r"C:\WORK\Swift\Bootup_Cali\redriver_I2c_program_79_part4.xml")
 
+# # Program MTP with the XML made by modify_binary_file
+# aardvark.execute_MTP_batch_file(r"mtp_batch.xml")
+
+# # Replay a binary batch file made by modify_binary_file (sidecar=1)
+# aardvark.execute_binary_batch_file(r"mtp_batch.i2cb")
+
 # # Close Aardvark connection
 # aardvark.close()
+
+# # Without hardware: the same calls against a simulated Sirius (see i2c_transport.py)
+# from i2c_transport import SimulatedTransport, DDC2BIDevice
+# bus = SimulatedTransport(bitrate=400)
+# sirius = bus.attach(0x37, DDC2BIDevice(busy_ms=2))
+# aardvark = AardvarkController(i2c_address=0x37, transport=bus)
+# aardvark.open()
+# aardvark.execute_MTP_batch_file(r"mtp_batch.xml")
+# print(f"Projected bus time: {bus.elapsed_ms:.1f} ms")
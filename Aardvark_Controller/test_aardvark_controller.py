@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:40:27 2026
+
+Tests for AardvarkController on the simulated bus (run with pytest).
+"""
+
+import contextlib
+import io
+import os
+
+from aardvark_controller import AardvarkController
+from i2c_batch import FLAG_NOSTOP, OP_READ, OP_SLEEP, OP_WRITE, BatchWriter, read_batch
+from i2c_transport import DDC2BIDevice, RegisterFile, SimulatedTransport
+from modify_binary_file_01062025 import modify_binary_file
+
+MTP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                        "MTP_Develop", "Script", "MTP_DATA_1K.bin")
+
+
+def test_read_block():
+    bus = SimulatedTransport()
+    device = bus.attach(0x50, RegisterFile())
+    device.registers[0x10:0x14] = b"\x01\x02\x03\x04"
+    aardvark = AardvarkController(0x50, transport=bus)
+    aardvark.open()
+    assert aardvark.read_block(0x10, 4) == b"\x01\x02\x03\x04"
+    aardvark.close()
+
+
+def test_read_block_nack_is_an_error():
+    bus = SimulatedTransport()
+    aardvark = AardvarkController(0x50, transport=bus)
+    aardvark.open()
+    assert aardvark.read_block(0x00, 4) is None
+    aardvark.close()
+
+
+def replay(method, path):
+    bus = SimulatedTransport()
+    sirius = bus.attach(0x37, DDC2BIDevice(busy_ms=1))
+    aardvark = AardvarkController(0x37, transport=bus)
+    aardvark.open()
+    assert getattr(aardvark, method)(path)
+    aardvark.close()
+    return bus, sirius
+
+
+def test_batch_writer_round_trip(tmp_path):
+    path = str(tmp_path / "batch.i2cb")
+    with BatchWriter(path) as batch:
+        batch.write(0x37, b"\x51\x85", nostop=True)
+        batch.read(0x37, 8)
+        batch.sleep(2)
+    records = [(op, addr, flags, bytes(arg) if op == OP_WRITE else arg) for op, addr, flags, arg in read_batch(path)]
+    assert records == [(OP_WRITE, 0x37, FLAG_NOSTOP, b"\x51\x85"), (OP_READ, 0x37, 0, 8), (OP_SLEEP, 0, 0, 2)]
+
+
+def test_binary_replay_matches_xml_replay(tmp_path):
+    xml_path = str(tmp_path / "mtp_batch.xml")
+    with contextlib.redirect_stdout(io.StringIO()):
+        modify_binary_file("mtpfull", MTP_FILE, str(tmp_path / "mtp.bin"), xml_path,
+                           chunk_size=64, engineer="indie", sidecar=True)
+
+    xml_bus, xml_sirius = replay("execute_MTP_batch_file", xml_path)
+    bin_bus, bin_sirius = replay("execute_binary_batch_file", str(tmp_path / "mtp_batch.i2cb"))
+
+    assert bin_sirius.blocks == xml_sirius.blocks > 1
+    assert bin_sirius.pages == xml_sirius.pages
+    assert (bin_bus.transactions, bin_bus.bytes_written, bin_bus.bytes_read) == \
+        (xml_bus.transactions, xml_bus.bytes_written, xml_bus.bytes_read)
+    assert bin_bus.elapsed_ms == xml_bus.elapsed_ms
+
+
+def open_register_device(**kwargs):
+    bus = SimulatedTransport()
+    device = bus.attach(0x10, RegisterFile())
+    aardvark = AardvarkController(0x10, transport=bus, **kwargs)
+    aardvark.open()
+    return bus, device, aardvark
+
+
+def test_shadow_skips_only_writes_it_holds_completely():
+    bus, device, aardvark = open_register_device(shadow=True)
+    aardvark.basic_write(0x4A, [0xFC, 0x07, 0x00])
+    assert bus.transactions == 1
+
+    aardvark.basic_write(0x4A, [0xFC, 0x07, 0x00])
+    assert bus.transactions == 1
+
+    # Only the high byte changes: the 3-byte trim still goes out whole
+    aardvark.basic_write(0x4A, [0xFC, 0x07, 0x01])
+    assert (bus.transactions, bus.bytes_written) == (2, 8)
+    assert device.registers[0x4A:0x4D] == b"\xFC\x07\x01"
+
+
+def test_session_sends_partly_held_writes_whole():
+    bus, device, aardvark = open_register_device(shadow=True)
+    aardvark.basic_write(0x4A, [0xFC, 0x07, 0x00])
+    written = bus.bytes_written
+    with aardvark.burst() as regs:
+        regs.write(0x4A, [0xFC, 0x07, 0x01])
+    assert bus.bytes_written - written == 4
+
+
+def test_reads_are_cached_only_on_request():
+    bus, device, aardvark = open_register_device(shadow=True)
+    device.registers[0x20:0x22] = b"\x12\x34"
+    aardvark.read_block(0x20, 2)
+    assert aardvark.shadow == {}
+
+    aardvark.read_block(0x20, 2, cache=True)
+    assert aardvark.shadow == {0x20: 0x12, 0x21: 0x34}
+
+
+def test_short_read_is_not_cached():
+    bus, device, aardvark = open_register_device(shadow=True)
+    bus.write_read = lambda addr, data, count: (1, b"\x12")
+    aardvark.read_block(0x20, 2, cache=True)
+    assert aardvark.shadow == {}
+
+
+def test_session_coalesces_queued_writes_into_one_burst():
+    bus, device, aardvark = open_register_device()
+    with aardvark.session() as regs:
+        regs.write(0x40, [0x01, 0x02])
+        regs.write(0x42, [0x03])
+        regs.write(0x43, [0x04, 0x05])
+        assert regs.commit() == {}
+    # One 6-byte write, then one read_block over 0x40..0x44
+    assert (bus.transactions, bus.bytes_written, bus.bytes_read) == (2, 7, 5)
+    assert device.registers[0x40:0x45] == b"\x01\x02\x03\x04\x05"
+
+
+class ReadOnlyRegister(RegisterFile):
+    """RegisterFile whose register 0x41 ignores writes."""
+
+    def write(self, data, now_ms):
+        held = self.registers[0x41]
+        super().write(data, now_ms)
+        self.registers[0x41] = held
+        return True
+
+
+def test_session_reports_mismatched_read_back():
+    bus = SimulatedTransport()
+    bus.attach(0x10, ReadOnlyRegister())
+    aardvark = AardvarkController(0x10, transport=bus)
+    aardvark.open()
+    regs = aardvark.session()
+    regs.write(0x40, [0x01, 0x02, 0x03])
+    assert regs.commit() == {0x41: (0x02, 0x00)}
+
+
+def test_session_short_write_invalidates_shadow():
+    bus, device, aardvark = open_register_device(shadow=True)
+    aardvark.basic_write(0x20, [0x11])
+    assert aardvark.shadow == {0x20: 0x11}
+
+    bus.write = lambda addr, data, nostop=False: 1
+    regs = aardvark.session()
+    regs.write(0x40, [0x01, 0x02])
+    assert regs.commit() is None
+    assert aardvark.shadow == {}
+
+
+def test_replay_transport_error_returns_false(tmp_path):
+    path = tmp_path / "batch.xml"
+    path.write_text('<aardvark><i2c_write addr="0x10">00 01</i2c_write></aardvark>')
+    bus, device, aardvark = open_register_device()
+
+    def unplugged(addr, data, nostop=False):
+        raise OSError("adapter unplugged")
+    bus.write = unplugged
+    assert aardvark.execute_MTP_batch_file(str(path)) is False
@@ -5,11 +5,14 @@ Created on Thu Jan  9 11:39:55 2025
 @author: CC.Cheng
 """
 
-from aardvark_py import *
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import time, os, sys, tqdm
 import ctypes
+from array import array
+
+from crc16 import crc16
+from i2c_transport import AardvarkTransport
 
 """
 General Functions
@@ -55,16 +58,7 @@ def GetCRC(buf):
     Generate CRC at the end of each chunk
 
     '''
-    crc = 0x1021
-    for byte_buf in bytearray(buf):
-        data = byte_buf
-        for i in range(8):
-            flag = data ^ (crc >> 8)
-            crc = (crc << 1) & 0xFFFF
-            if flag & 0x80:
-                crc = (crc ^ 0x1021) & 0xFFFF
-            data <<= 1
-    return crc
+    return crc16(buf)
 
 
 """
@@ -76,17 +70,21 @@ ISP over I2C master class
 class ISP_I2CM(object):
     bitrate = 100  # kHz
 
-    def __init__(self, slave_id=0x14, unique_id=-1, re_open=True):
+    def __init__(self, slave_id=0x14, unique_id=-1, re_open=True, transport=None):
 
         '''
         Initialized All of Constants that we will use in next step
+        transport: an i2c_transport.I2CTransport (e.g. SimulatedTransport), default is the Aardvark
 
         '''
         # Initialized All of Constants that we will use in next step
         self.SlaveID = slave_id
         self.re_open = re_open
         self.unique_id = unique_id
-        self.handle = 0
+        if transport is None:
+            transport = AardvarkTransport(self.bitrate, unique_id=unique_id, re_open=re_open,
+                                          pullup=False, target_power=False)
+        self.transport = transport
         self.open_i2c()
 
     def open_i2c(self):
@@ -95,33 +93,8 @@ class ISP_I2CM(object):
         Established the Connection with I2C AARDVARK
 
         '''
-        (num, ports, unique_ids) = aa_find_devices_ext(16, 16)  # Find all the attached devices
-        if num == 0:
-            raise Exception("Aardvark I2C is not connected!!")
-        s = ""
-        for port, u_id in zip(ports, unique_ids):  # Open port
-            if self.unique_id == -1 or self.unique_id == u_id:
-                if self.re_open == True and port >= 0x8000:
-                    for h in range(1, 100):
-                        if port & 0x7FFF == aa_port(h):
-                            s = "(Re-connect)"
-                            self.handle = h
-                            break
-                    else:
-                        raise Exception("Failed to re-open aardvark I2c")
-                    break
-                elif port < 0x8000:
-                    self.handle = aa_open(port)
-                    break
-        else:
-            raise Exception("No available aardvark I2C, Plase check <re_open> or <unique_id>")
-
-        if self.handle < 0:
-            raise Exception("Problem with I2C open")
-        # else :
-        #     print ("Aardvark : Connected to %d%s"%(aa_unique_id(self.handle),s))
-        aa_configure(self.handle, AA_CONFIG_SPI_I2C)  # Ensure that the I2C subsystem is enabled
-        bitrate = aa_i2c_bitrate(self.handle, self.bitrate)  # Set the bitrate
+        self.transport.bitrate = self.bitrate
+        self.transport.open()  # Find the device, enable I2C and set the bitrate
 
     def close_i2c(self):
 
@@ -129,7 +102,7 @@ class ISP_I2CM(object):
         Break the Connection with I2C AARDVARK
 
         '''
-        aa_close(self.handle)
+        self.transport.close()
 
     def writeDDC2Bi3_I2C(self, *wdata, ReadAfrWrite=True):
 
@@ -142,10 +115,10 @@ class ISP_I2CM(object):
             data_out.append(w & 0xFF)
         if ReadAfrWrite == True:  # Normal Case: Read I2C after Write
             c1, c2, rval, c3 = (0, 0, 0, 0)
-            l = aa_i2c_write(self.handle, self.SlaveID, AA_I2C_NO_FLAGS, data_out)  # WRITE COMMAND
+            l = self.transport.write(self.SlaveID, data_out)  # WRITE COMMAND
             for i in range(10000):  # READ LOOP
                 c1, c2, rval, c3 = (0, 0, 0, 0)
-                c1, rval = aa_i2c_read(self.handle, self.SlaveID, AA_I2C_NO_FLAGS, 8)  # READ COMMAND
+                c1, rval = self.transport.read(self.SlaveID, 8)  # READ COMMAND
                 eee = [varx[1] for varx in enumerate(list(map(hex, rval))) if varx[0] in [5, 6]]  # PULL OUT Bit 5&6
                 eeee = [varx[1] for varx in enumerate(list(map(hex, rval))) if varx[0] in [1]]  # PULL OUT Bit 1
 
@@ -159,9 +132,8 @@ class ISP_I2CM(object):
                 elif eeee == ['0x80']:
                     # print('\n------------ Waiting, Device is Busy. -------------------')        #Waiting always happen, so disable this print msg for clean up
                     c1, c2, rval, c3 = (0, 0, 0, 0)
-                    c1, rval = aa_i2c_read(self.handle, self.SlaveID, AA_I2C_NO_FLAGS,
-                                           8)  # Send READ COMMAND again until receive ACK
-                    time.sleep(0.5)
+                    c1, rval = self.transport.read(self.SlaveID, 8)  # Send READ COMMAND again until receive ACK
+                    self.transport.delay(500)
                 else:
                     # print('\nERROR ERROR ERROR ERROR ERROR ERROR ERROR ERROR ERROR ERROR ERROR ERROR ')
                     raise Exception("I2C ERROR.\n")
@@ -169,7 +141,7 @@ class ISP_I2CM(object):
 
         else:
             c1, c2, rval, c3 = (0, 0, 0, 0)  # Special Case: Write I2C without READ back
-            l = aa_i2c_write(self.handle, self.SlaveID, AA_I2C_NO_FLAGS, data_out)  # WRITE COMMAND
+            l = self.transport.write(self.SlaveID, data_out)  # WRITE COMMAND
 
     def _send_command(self, *data):
 
@@ -257,7 +229,7 @@ class ISP_I2CM(object):
                 reg_addr[2] += 16
 
             # Simulate write delay
-            time.sleep(0.1)
+            self.transport.delay(100)
             self.writeDDC2Bi3_I2C(*bigdata, ReadAfrWrite=True)
 
             # Update progress
@@ -64,6 +64,7 @@ def float_to_p_string(value):
 
 
 def ModeSelect(CHIP, mode):
+    aardvark.invalidate_shadow()  # Every mode power cycles the part, so forget the cached register values
     if CHIP == 'PARADE':
         if mode == "ReTimerMode_noSSC":
             pwr.set_outputOFF()
@@ -410,7 +411,8 @@ scope = Keysight_91304A(ADDR_SCOPE)
 pwr = Agilent_E3631A(ADDR_PWR)
 mitt = Agilent_34401A(ADDR_MITT)
 # temp = TemperatureChamber(5)
-aardvark = AardvarkController(i2c_address=0x10, bitrate=400)
+# shadow: skip register writes the part already holds (0x0C/0x0D and 0xB0~0xB6 are commands, always sent)
+aardvark = AardvarkController(i2c_address=0x10, bitrate=400, shadow=True, volatile=[0x0C, 0x0D, *range(0xB0, 0xB7)])
 aardvark.open()
 
 time.sleep(5)
@@ -470,6 +472,7 @@ pwr.set_outputOFF()
 pwr.set_VoltageP25V(1.2)  # SET 1.2V 1A for INITIALIZATION
 pwr.get_CurrP25V()
 pwr.set_outputON()
+aardvark.invalidate_shadow()  # Power cycled, so forget the cached register values
 time.sleep(1)
 serial = Serial_Num()[0]
 print("################# Serial Number = %s #################" % (serial))
@@ -555,6 +558,7 @@ for target_temp in TEMPERATURE:  # SET TEMPERATURE FROM CHAMBER
                                                                             PE)  # Always 2L LT when testing L0 or L1
                                                 for v12 in V12:
                                                     pwr.set_VoltageP25V(v12)
+                                                    aardvark.invalidate_shadow()  # Supply changed, registers may have reset
                                                     pwr.get_CurrP25V()
                                                     if METER_CORRECTION == True:
                                                         #                                                print("Correcting VDD ...")
@@ -568,6 +572,7 @@ for target_temp in TEMPERATURE:  # SET TEMPERATURE FROM CHAMBER
                                                             else:
                                                                 v12_adj -= step
                                                             pwr.set_VoltageP25V(v12_adj)
+                                                            aardvark.invalidate_shadow()
 
                                                             pwr.get_CurrP25V()
                                                             real_vol = mitt.meas_vol()
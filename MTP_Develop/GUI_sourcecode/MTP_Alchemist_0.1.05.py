@@ -10,13 +10,18 @@ Application Name: MTP Alchemist
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import pandas as pd
+import numpy as np
 import shutil
 import os
 import sqlite3
-import subprocess
 from datetime import datetime
-import xml.etree.ElementTree as ET
-import binascii
+
+# Shared MTP modules from ../Script: installed with pip install -e . (repository
+# root) and bundled by MTP_Alchemist_0.1.05.spec for the frozen app
+from crc16 import crc16
+from modify_binary_file_01062025 import modify_binary_file
+from mtp_pipeline import (CRC_RANGES, MTP_ADDR_BASE, MTP_IMAGE_SIZE, OUTPUT_NAMES, MTPImage, combine_xml,
+                          field_bytes)
 
 # Constants
 GUI_VERSION = 'MTP Alchemist A2 Ver0.1.05'
@@ -25,21 +30,32 @@ GUI_THEME = 'clam'  # e.g., 'winnative', 'clam', 'alt', 'default', 'classic', 'v
 
 Update_File_Path = r"MTPDATA_update_execute.xml"
 SQL_FILE = r"SiriusA2_MTPRegisterSpecification.db"
-
-#TRACKING TAB
-CRC_TRAC_RANGE_START = 0x7C00
-CRC_TRAC_RANGE_END = 0x7C09
-#DUSR TAB
-CRC_DUSR_ID_RANGE_START = 0x7C10
-CRC_DUSR_ID_RANGE_END = 0x7C1D
-CRC_DUSR_RANGE_START = 0x7C10
-CRC_DUSR_RANGE_END = 0x7D49
-#CALIBRATION TAB
-CRC_CALI_RANGE_START = 0x7D4C
-CRC_CALI_RANGE_END = 0x7D5D
-#CONFIGURATION TAB
-CRC_CONF_RANGE_START = 0x7D64
-CRC_CONF_RANGE_END = 0x7DE9
+SQL_TABLE = "SiriusA2_MTPRegisterSpecification"
+
+# MTP map: MTP address 0x7C00 is RAM 0x13000; image layout, sizes and CRC
+# ranges come from mtp_pipeline
+MTP_RAM_BASE = 0x13000
+
+# Register tab name -> DB section
+TAB_SECTIONS = {
+    "Tracking": "Tracking Data",
+    "Process Monitor Data": "ACBIN Data",
+    "DUSR": "DUSR",
+    "CALIBRATION": "Calibration",
+    "OVST Flag": "OVST Flag",
+    "CONFIGURATION": "Configuration",
+}
+
+# Matrix tab name -> (first RAM row, last RAM address) shown in the Matrix Box
+MATRIX_RANGES = {
+    "Tracking": (0x13000, 0x1300B),  # 0x13000 ~ 0x1300B
+    "Process Monitor Data": (0x13000, 0x1300F),  # 0x1300C ~ 0x1300F
+    "DUSR": (0x13010, 0x1314A),  # 0x13010 ~ 0x1314A
+    "CALIBRATION": (0x13140, 0x1315E),  # 0x13140 ~ 0x1315E
+    "OVST Flag": (0x13160, 0x13163),  # 0x1315F ~ 0x13163
+    "CONFIGURATION": (0x13160, 0x131EB),  # 0x13164 ~ 0x131EB
+    # "Redundancy Mirror": (0x13200, 0x133EB),  # 0x13200 ~ 0x133EB
+}
 
 class DatabaseController:
     def __init__(self, filepath):
@@ -48,14 +64,36 @@ class DatabaseController:
         
         # Connect to the database
         self.connection = sqlite3.connect(self.modified_path)
+        self.connection.execute(f'CREATE INDEX IF NOT EXISTS idx_row_index ON {SQL_TABLE} ("index");')
+        self.connection.execute(f'CREATE INDEX IF NOT EXISTS idx_section_address ON {SQL_TABLE} (section, "MTP address");')
+        # DB "index" -> new value for rows edited since the last save_changes()
+        self._dirty_rows = {}
+        # Callables notified as listener(address, old_bytes, new_bytes) whenever
+        # an edit changes the MTP image (b'' = the field holds no value)
+        self.change_listeners = []
         
-        # Load registers
-        self.dataframe = self._load_map_tab("Configuration")
-        self.dusr_dataframe = self._load_map_tab("DUSR")
-        self.calibration_dataframe = self._load_map_tab("Calibration")
-        self.trac_dataframe = self._load_map_tab("Tracking Data")
-        self.prod_dataframe = self._load_map_tab("ACBIN Data")
-        self.ovst_dataframe = self._load_map_tab("OVST Flag")
+        # Load registers: one query, DataFrames are built on first access per tab
+        self._section_frames = {}
+        # Integer MTP address per row label, per tab
+        self._address_columns = {}
+        self._load_sections()
+
+        # Address lookups, built once so selects/edits/CRC don't scan columns
+        self._build_address_index()
+
+        # Canonical byte image of the MTP map; edits write straight into it
+        self._build_image()
+
+        # Sub-field shift/mask tables from bit_address
+        self._compile_field_layout()
+
+    # Register DataFrames, materialized lazily from the rows loaded at startup
+    dataframe = property(lambda self: self._section_frame("Configuration"))
+    dusr_dataframe = property(lambda self: self._section_frame("DUSR"))
+    calibration_dataframe = property(lambda self: self._section_frame("Calibration"))
+    trac_dataframe = property(lambda self: self._section_frame("Tracking Data"))
+    prod_dataframe = property(lambda self: self._section_frame("ACBIN Data"))
+    ovst_dataframe = property(lambda self: self._section_frame("OVST Flag"))
     
     def _create_copy(self):
         """Create a timestamped copy of the original Excel file for manipulation."""
@@ -65,17 +103,24 @@ class DatabaseController:
         return copy_path
         
  
-    def _query_section(self, section_name):
-        """Query data for a specific section from the database."""
-        query = f"""
-        SELECT * FROM SiriusA2_MTPRegisterSpecification
-        WHERE section = '{section_name}';
-        """
-        return pd.read_sql_query(query, self.connection)
+    def _load_sections(self):
+        """Read the whole register table once and partition the rows by section."""
+        cursor = self.connection.execute(f'SELECT * FROM {SQL_TABLE} ORDER BY section, "MTP address", "index";')
+        self._columns = [column[0] for column in cursor.description]
+        self._section_rows = {section: [] for section in TAB_SECTIONS.values()}
+        for row in cursor:
+            self._section_rows.setdefault(row[2], []).append(row)
+
+    def _section_frame(self, section):
+        """Return the DataFrame for a section, building it on first use."""
+        df = self._section_frames.get(section)
+        if df is None:
+            df = self._section_frames[section] = self._load_map_tab(section)
+        return df
     
     def _load_map_tab(self, section):
-        """Load the TRACKING data."""
-        df = self._query_section(section)
+        """Build the DataFrame for one section (rows are already sorted by MTP address)."""
+        df = pd.DataFrame.from_records(self._section_rows.get(section, []), columns=self._columns)
         df.rename(columns={
             df.columns[3]: 'MTP address',
             df.columns[4]: 'Record Field',
@@ -84,327 +129,272 @@ class DatabaseController:
             df.columns[8]: 'Value',
             df.columns[9]: 'Description'
         }, inplace=True)
-        df.sort_values(by='MTP address', inplace=True)
         return df
 
-    def compute_crc16(self, data: bytes, poly: int = 0x1021, init: int = 0x1021) -> int:
+    def get_dataframe(self, tab_name):
+        """Return the DataFrame behind a register tab, or None."""
+        section = TAB_SECTIONS.get(tab_name)
+        return self._section_frame(section) if section else None
+
+    def _build_address_index(self):
         """
-        Compute CRC16 based on bit-by-bit processing logic.
+        Build the per-tab address index {int address: [row labels in DB order]}
+        and the global map {int address: (tab name, first row label)}.
         """
-        crc = init
-        
-        for byte in data:
-            for _ in range(8):  # Process each bit in the byte
-                msb = (crc >> 15) & 1
-                input_bit = (byte >> 7) & 1
-                crc = (crc << 1) & 0xFFFF  # Shift CRC and keep it 16-bit
-                if msb ^ input_bit:
-                    crc ^= poly
-                byte = (byte << 1) & 0xFF  # Shift byte for the next bit
-        return f"{crc:04X}"
+        self.address_index = {}
+        self.address_map = {}
+        for tab_name, section in TAB_SECTIONS.items():
+            # Row labels are positions in the section's row list (see _load_map_tab)
+            section_rows = self._section_rows[section]
+            rows = {}
+            for label, row in sorted(enumerate(section_rows), key=lambda r: r[1][0]):
+                address = row[3]
+                try:
+                    rows.setdefault(int(address, 16), []).append(label)
+                except (ValueError, TypeError):
+                    continue
+            self.address_index[tab_name] = rows
+            for address, labels in rows.items():
+                self.address_map.setdefault(address, (tab_name, labels[0]))
+
+    def rows_at(self, tab_name, address):
+        """Row labels for an MTP address (int or hex string) in DB order."""
+        if isinstance(address, str):
+            address = int(address, 16)
+        return self.address_index.get(tab_name, {}).get(address, [])
+
+    def register_rows(self, tab_name):
+        """(MTP address, record field, field width) of the first row at each address, in address order."""
+        section_rows = self._section_rows[TAB_SECTIONS[tab_name]]
+        return [(address, section_rows[labels[0]][4], section_rows[labels[0]][5])
+                for address, labels in sorted(self.address_index[tab_name].items())]
 
-    def calculate_crc_for_conf_range(self):
-        """Calculate CRC for a given address range and update CRC fields."""
-        def sanitize_address(x):
-            try:
-                return f"{int(x, 16):04X}"
-            except (ValueError, TypeError):
-                return None
+    def compute_crc16(self, data: bytes, poly: int = 0x1021, init: int = 0x1021) -> int:
+        """
+        Compute CRC16 (table-driven, see crc16.py) and return it as 4 hex digits.
+        """
+        return f"{crc16(data, init, poly):04X}"
+
+    def _row_addresses(self, tab_name):
+        """Integer MTP address per row label of a tab (-1 where the address is invalid)."""
+        addresses = self._address_columns.get(tab_name)
+        if addresses is None:
+            addresses = np.full(len(self._section_rows[TAB_SECTIONS[tab_name]]), -1, dtype=np.int64)
+            for address, labels in self.address_index[tab_name].items():
+                addresses[labels] = address
+            self._address_columns[tab_name] = addresses
+        return addresses
+
+    def _build_image(self):
+        """
+        Build the canonical MTP image (RAM 0x13000 ~ 0x133FF, an mtp_pipeline
+        MTPImage) from the loaded rows. mtp_image / image_valid are views of
+        its bytes and valid mask; tab_spans records which image bytes belong
+        to each tab.
+        """
+        self.image = MTPImage()
+        self.mtp_image = self.image.data
+        self.image_valid = np.frombuffer(self.image.valid, dtype=bool)
+        self.tab_spans = {}
+        for tab_name, section in TAB_SECTIONS.items():
+            start, end = MTP_IMAGE_SIZE, 0
+            for address, labels in self.address_index[tab_name].items():
+                offset = address - MTP_ADDR_BASE
+                start = min(start, offset)
+                for label in labels:
+                    row = self._section_rows[section][label]
+                    end = max(end, offset + field_bytes(row[5]))
+                    if row[8] is not None:
+                        self._write_field(address, row[5], row[8])
+            self.tab_spans[tab_name] = (start, end)
+
+    def _write_field(self, address, field_width, value):
+        """Write a register value into the image, right-aligned in its field width."""
+        offset = address - MTP_ADDR_BASE
+        width = field_bytes(field_width)
+        if not 0 <= offset <= MTP_IMAGE_SIZE - width:
+            return
+        before = self._field_state(offset, width)
+        self.image.write_field(address, field_width, value)
+        after = self._field_state(offset, width)
+        if after != before:
+            for listener in self.change_listeners:
+                listener(address, before[0], after[0])
+
+    def _field_state(self, offset, width):
+        """(field bytes, or b'' unless all of them hold a value; per-byte valid mask)."""
+        valid = self.image_valid[offset:offset + width]
+        data = bytes(self.mtp_image[offset:offset + width]) if valid.all() else b""
+        return data, valid.tobytes()
+
+    @staticmethod
+    def _parse_bit_address(bit_address, nbits):
+        """'msb:lsb' -> (shift, mask); the whole register if it is missing or malformed."""
+        try:
+            msb, lsb = (int(bit) for bit in str(bit_address).split(':'))
+        except ValueError:
+            msb, lsb = nbits - 1, 0
+        return lsb, ((1 << (msb - lsb + 1)) - 1) << lsb
 
-        self.dataframe['MTP address'] = self.dataframe['MTP address'].apply(sanitize_address)
-        filtered_data = self.dataframe[
-            self.dataframe['MTP address'].apply(lambda x: x is not None and CRC_CONF_RANGE_START <= int(x, 16) <= CRC_CONF_RANGE_END)
+    def _compile_field_layout(self):
+        """
+        Precompute the layout of every register from bit_address:
+        {int address: (tab name, image offset, byte count, [(row label, sub field name, shift, mask), ...])}
+        """
+        self.field_layout = {}
+        for tab_name, section in TAB_SECTIONS.items():
+            section_rows = self._section_rows[section]
+            for address, labels in self.address_index[tab_name].items():
+                nbytes = 1
+                for label in labels:
+                    row = section_rows[label]
+                    msb = str(row[7]).split(':')[0]
+                    nbytes = max(nbytes, field_bytes(row[5]), (int(msb) // 8 + 1) if msb.isdigit() else 1)
+                fields = []
+                for label in labels:
+                    shift, mask = self._parse_bit_address(section_rows[label][7], nbytes * 8)
+                    fields.append((label, section_rows[label][6], shift, mask))
+                self.field_layout[address] = (tab_name, address - MTP_ADDR_BASE, nbytes, fields)
+
+    def decode_register(self, address):
+        """Register value as an int read from the image, or None if it holds no value."""
+        _, offset, nbytes, _ = self.field_layout[address]
+        if not self.image_valid[offset:offset + nbytes].all():
+            return None
+        return int.from_bytes(self.mtp_image[offset:offset + nbytes], 'big')
+
+    def register_hex(self, address):
+        """Register value as zero-padded hex, or "" if it holds no value."""
+        value = self.decode_register(address)
+        return "" if value is None else f"{value:0{self.field_layout[address][2] * 2}X}"
+
+    def unpack_fields(self, address):
+        """Sub-field values of a register: [(sub field name, value or None), ...] in DB order."""
+        register = self.decode_register(address)
+        return [
+            (name, None if register is None else (register & mask) >> shift)
+            for _, name, shift, mask in self.field_layout[address][3]
         ]
 
-        # Collect values for CRC calculation
-        values = []
-        for value in filtered_data['Value']:
-            if isinstance(value, str) and all(c in "0123456789ABCDEF" for c in value.upper()):
-                values.append(value.upper())
-
-        crc_data = values
-        if not crc_data:
-            raise ValueError("No valid data found for CRC calculation.")
-
-        crc_data = ''.join(crc_data)
-        
-        # Convert the hex string to bytes
-        crc_data = bytes.fromhex(crc_data)
-        # Calculate CRC16
-        crc_value = self.compute_crc16(crc_data)
-
-        # Update CRC fields accordingly
-        self.dataframe.loc[self.dataframe['MTP address'] == '7DEA', 'Value'] = crc_value[:2]
-        self.dataframe.loc[self.dataframe['MTP address'] == '7DEB', 'Value'] = crc_value[-2:]
-        self.save_changes()
-        
-    def calculate_crc_for_DUSR_range(self):
-        """Calculate CRC for a given address range and update CRC fields."""
-        def sanitize_address(x):
-            try:
-                return f"{int(x, 16):04X}"
-            except (ValueError, TypeError):
-                return None
-
-        self.dusr_dataframe['MTP address'] = self.dusr_dataframe['MTP address'].apply(sanitize_address)
-        filtered_data = self.dusr_dataframe[
-            self.dusr_dataframe['MTP address'].apply(lambda x: x is not None and CRC_DUSR_ID_RANGE_START <= int(x, 16) <= CRC_DUSR_ID_RANGE_END)
-        ]
-        
-        # Collect values for CRC calculation
-        values = []
-        for value in filtered_data['Value']:
-            if isinstance(value, str) and all(c in "0123456789ABCDEF" for c in value.upper()):
-                values.append(value.upper())
-
-        crc_data = values
-        if not crc_data:
-            raise ValueError("No valid data found for CRC calculation.")
-
-        crc_data = ''.join(crc_data)
-        # Convert the hex string to bytes
-        crc_data = bytes.fromhex(crc_data)
-        # Calculate CRC16      
-        crc_value = self.compute_crc16(crc_data)
-        # Update CRC fields accordingly
-        self.dusr_dataframe.loc[self.dusr_dataframe['MTP address'] == '7C1E', 'Value'] = crc_value
+    def pack_fields(self, address, values):
+        """
+        Write sub-field values ({sub field name: int}) into a register.
+        The register value is stored on its first row, like the DB does.
+        """
+        tab_name, _, nbytes, fields = self.field_layout[address]
+        register = self.decode_register(address) or 0
+        for _, name, shift, mask in fields:
+            if name in values:
+                register = (register & ~mask) | ((values[name] << shift) & mask)
+        self._set_value(tab_name, fields[0][0], f"{register:0{nbytes * 2}X}")
         self.save_changes()
 
-        self.dusr_dataframe['MTP address'] = self.dusr_dataframe['MTP address'].apply(sanitize_address)
-        filtered_data = self.dusr_dataframe[
-            self.dusr_dataframe['MTP address'].apply(lambda x: x is not None and CRC_DUSR_RANGE_START <= int(x, 16) <= CRC_DUSR_RANGE_END)
-        ]
+    def crc_ranges(self, tab_name=None):
+        """mtp_pipeline.CRC_RANGES as (tab name, start, end, CRC field addresses), for one tab or all."""
+        for start, end, target_addrs in CRC_RANGES:
+            range_tab = self.address_map.get(target_addrs[0], (None,))[0]
+            if range_tab is not None and (tab_name is None or range_tab == tab_name):
+                yield range_tab, start, end, target_addrs
 
-        # Collect values for CRC calculation
-        values = []
-        for value in filtered_data['Value']:
-            if isinstance(value, str) and all(c in "0123456789ABCDEF" for c in value.upper()):
-                values.append(value.upper())
-
-        crc_data = values
-        if not crc_data:
-            raise ValueError("No valid data found for CRC calculation.")
-
-        crc_data = ''.join(crc_data)
-        # Convert the hex string to bytes
-        crc_data = bytes.fromhex(crc_data)
-        # Calculate CRC16      
-        crc_value = self.compute_crc16(crc_data)
-        # Update CRC fields accordingly
-        self.dusr_dataframe.loc[self.dusr_dataframe['MTP address'] == '7D4A', 'Value'] = crc_value
+    def crc_for_range(self, tab_name, start, end, target_addrs):
+        """
+        CRC16 over the valid bytes of start..end (inclusive) in a tab, written
+        big-endian into the CRC field(s) at target_addrs.
+        """
+        crc_fields = self.image.crc_fields(start, end, target_addrs)
+        for address, value in crc_fields:
+            self._set_value(tab_name, self.rows_at(tab_name, address), value)
+        return "".join(value for _, value in crc_fields)
+
+    def calculate_crc(self, tab_name=None):
+        """Calculate every CRC in CRC_RANGES for one tab (or all tabs if None) and save once."""
+        for range_tab, start, end, target_addrs in self.crc_ranges(tab_name):
+            self.crc_for_range(range_tab, start, end, target_addrs)
         self.save_changes()
-    
-    def calculate_crc_for_cali_range(self):
-        """Calculate CRC for a given address range and update CRC fields."""
-        def sanitize_address(x):
-            try:
-                return f"{int(x, 16):04X}"
-            except (ValueError, TypeError):
-                return None
 
-        self.calibration_dataframe['MTP address'] = self.calibration_dataframe['MTP address'].apply(sanitize_address)
-        filtered_data = self.calibration_dataframe[
-            self.calibration_dataframe['MTP address'].apply(lambda x: x is not None and CRC_CALI_RANGE_START <= int(x, 16) <= CRC_CALI_RANGE_END)
-        ]
-
-        # Collect values for CRC calculation
-        values = []
-        for value in filtered_data['Value']:
-            if isinstance(value, str) and all(c in "0123456789ABCDEF" for c in value.upper()):
-                values.append(value.upper())
+    def calculate_all_crc(self):
+        self.calculate_crc()
 
-        crc_data = values
-        if not crc_data:
-            raise ValueError("No valid data found for CRC calculation.")
+    def calculate_crc_for_conf_range(self):
+        self.calculate_crc("CONFIGURATION")
 
-        crc_data = ''.join(crc_data)
-        crc_data = bytes.fromhex(crc_data)
-        # Calculate CRC16      
-        crc_value = self.compute_crc16(crc_data)
+    def calculate_crc_for_DUSR_range(self):
+        self.calculate_crc("DUSR")
 
-        # Update CRC fields accordingly
-        self.calibration_dataframe.loc[self.calibration_dataframe['MTP address'] == '7D5E', 'Value'] = crc_value
-        self.save_changes()
+    def calculate_crc_for_cali_range(self):
+        self.calculate_crc("CALIBRATION")
 
     def calculate_crc_for_trac_range(self):
-        """Calculate CRC for a given address range and update CRC fields."""
-        def sanitize_address(x):
-            try:
-                return f"{int(x, 16):04X}"
-            except (ValueError, TypeError):
-                return None
-
-        self.trac_dataframe['MTP address'] = self.trac_dataframe['MTP address'].apply(sanitize_address)
-        filtered_data = self.trac_dataframe[
-            self.trac_dataframe['MTP address'].apply(lambda x: x is not None and CRC_TRAC_RANGE_START <= int(x, 16) <= CRC_TRAC_RANGE_END)
-        ]
-
-        # Collect values for CRC calculation
-        values = []
-        for value in filtered_data['Value']:
-            if isinstance(value, str) and all(c in "0123456789ABCDEF" for c in value.upper()):
-                values.append(value.upper())
-
-        crc_data = values
-        if not crc_data:
-            raise ValueError("No valid data found for CRC calculation.")
-
-        crc_data = ''.join(crc_data)
-        # Convert the hex string to bytes
-        crc_data = bytes.fromhex(crc_data)
-        # Calculate CRC16      
-        crc_value = self.compute_crc16(crc_data)
-
-        # Update CRC fields accordingly
-        self.trac_dataframe.loc[self.trac_dataframe['MTP address'] == '7C0A', 'Value'] = crc_value[:2] +  crc_value[-2:]
-        self.save_changes()
+        self.calculate_crc("Tracking")
 
     def clear_crc(self, tab):
         """Clear the CRC fields."""
-        if tab == "CONFIGURATION":
-            self.dataframe.loc[self.dataframe['MTP address'] == '7DEA', 'Value'] = None
-            self.dataframe.loc[self.dataframe['MTP address'] == '7DEB', 'Value'] = None
-            self.save_changes()
-        if tab == "DUSR":
-            self.dusr_dataframe.loc[self.dusr_dataframe['MTP address'] == '7C1E', 'Value'] = None
-            self.dusr_dataframe.loc[self.dusr_dataframe['MTP address'] == '7D4A', 'Value'] = None
-            self.save_changes()
-        if tab == "CALIBRATION":
-            self.calibration_dataframe.loc[self.calibration_dataframe['MTP address'] == '7D5E', 'Value'] = None
-            self.save_changes()
-        if tab == "Tracking":
-            self.trac_dataframe.loc[self.trac_dataframe['MTP address'] == '7C0A', 'Value'] = None
-            self.save_changes()
+        for _, _, _, target_addrs in self.crc_ranges(tab):
+            for address in target_addrs:
+                self._set_value(tab, self.rows_at(tab, address), None)
+        self.save_changes()
+
+    def _set_value(self, tab_name, rows, value):
+        """Set 'Value' for the given row label(s) of a tab and mark them dirty."""
+        df = self.get_dataframe(tab_name)
+        if pd.api.types.is_scalar(rows):
+            rows = [rows]
+        addresses = self._row_addresses(tab_name)
+        section_rows = self._section_rows[TAB_SECTIONS[tab_name]]
+        for label in rows:
+            if addresses[label] >= 0:
+                self._write_field(int(addresses[label]), section_rows[label][5], value)
+            self._dirty_rows[int(df.at[label, 'index'])] = value
+        df.loc[rows, 'Value'] = value
 
     def save_changes(self):
-        """Save changes to all relevant database sections."""
-        # Save each DataFrame back to its respective section in the database
-        sections = {
-            "Configuration": self.dataframe,
-            "DUSR": self.dusr_dataframe,
-            "Calibration": self.calibration_dataframe,
-            "Tracking Data": self.trac_dataframe,
-            "ACBIN Data": self.prod_dataframe,
-            "OVST Flag": self.ovst_dataframe
-        }
-        for section_name, df in sections.items():
-            self._save_section(df, section_name)
-    
-    def _save_section(self, df, section_name):
-        """Update the database with the contents of a single section."""
+        """Write all dirty rows back to the database in a single transaction."""
+        if not self._dirty_rows:
+            return
         try:
-            # Remove rows for the specified section
-            self.connection.execute(f"DELETE FROM SiriusA2_MTPRegisterSpecification WHERE section = '{section_name}';")
-            self.connection.commit()
-            
-            # Write the updated data back to the database
-            # print(df)
-            df.to_sql("SiriusA2_MTPRegisterSpecification", self.connection, if_exists="append", index=False)
+            with self.connection:
+                self.connection.executemany(
+                    f'UPDATE {SQL_TABLE} SET value = ? WHERE "index" = ?;',
+                    [(value, row_index) for row_index, value in self._dirty_rows.items()]
+                )
+            self._dirty_rows.clear()
         except Exception as e:
-            print(f"Error saving section '{section_name}': {e}")
+            print(f"Error saving changes: {e}")
     
     def update_value(self, tab_name, address, new_value):
         """Update a specific MTP address value in the appropriate tab's dataframe."""
-        if tab_name == "CONFIGURATION":
-            df = self.dataframe
-        elif tab_name == "DUSR":
-            df = self.dusr_dataframe
-        elif tab_name == "CALIBRATION":
-            df = self.calibration_dataframe
-        elif tab_name == "Tracking":
-            df = self.trac_dataframe
-        elif tab_name == "Process Monitor Data":
-            df = self.prod_dataframe
-        elif tab_name == "OVST Flag":
-            df = self.ovst_dataframe
-        else:
+        df = self.get_dataframe(tab_name)
+        if df is None:
             return  
 
-        # Update the value for the given address
-        # df.loc[df['MTP address'].str.upper() == address.upper(), 'Value'] = new_value
-        # Update only the first matching row's 'Value' column
-        # df.loc[df[df['MTP address'].str.upper() == address.upper()].index[0], 'Value'] = new_value
-        matching_rows = df[df['MTP address'].str.upper() == address.upper()]
-
-        # Check if there are matches
-        if not matching_rows.empty:
-            # Sort by another column (e.g., 'Timestamp') in ascending order
-            matching_rows = matching_rows.sort_values(by='index', ascending=True)  
-        
-            # Get the index of the first row after sorting
-            first_index = matching_rows.index[0]
-        
-            # Update the 'Value' column for that row
-            df.loc[first_index, 'Value'] = new_value
+        # Update only the first matching row (lowest DB index) for this address
+        matching_rows = self.rows_at(tab_name, address)
+        if matching_rows:
+            self._set_value(tab_name, matching_rows[0], new_value)
         self.save_changes()
 
     def generate_binary_file_mtpconfig(self, output_path):
         """Generate a binary file from the current values."""
-        hex_values = self.dataframe['Value'].dropna().apply(lambda x: f"{int(str(x), 16):02X}").tolist()
-        # print(hex_values)
-        binary_data = binascii.unhexlify(''.join(hex_values))
-        # print(binary_data)
-        padding = b'\x00' * 356
+        # 0x13164 ~ 0x131EB, after a zeroed product area
         with open(output_path, 'wb') as f:
-            f.write(padding + binary_data)
+            f.write(self.image.bin_data("mtpconfig"))
 
     def generate_binary_file_mtpproduct(self, output_path):
         """Generate a binary file from the current values."""
-        trac_hex_values = self.trac_dataframe['Value'].dropna().apply(lambda x: f"{int(str(x), 16):X}".zfill(len(str(x)))).tolist()
-        acbi_hex_values = self.prod_dataframe['Value'].dropna().apply(lambda x: f"{int(str(x), 16):X}".zfill(len(str(x)))).tolist()
-        # conf_hex_values = self.dataframe['Value'].dropna().apply(lambda x: f"{int(str(x), 16):02X}").tolist()
-        dusr_hex_values = self.dusr_dataframe['Value'].dropna().apply(lambda x: f"{int(str(x), 16):X}".zfill(len(str(x)))).tolist()
-        ovst_hex_values = self.ovst_dataframe['Value'].dropna().apply(lambda x: f"{int(str(x), 16):X}".zfill(len(str(x)))).tolist()
-        cali_hex_values = self.calibration_dataframe['Value'].dropna().apply(lambda x: f"{int(str(x), 16):X}".zfill(len(str(x)))).tolist()
-        # spar_hex_values = ['00'] * 20
-        
         # 0x13000 ~ 0x13163
-        first_half_hex_values = trac_hex_values + acbi_hex_values + dusr_hex_values + cali_hex_values + ovst_hex_values
-        
-        # hex_values = first_half_hex_values * 2
-        hex_values = first_half_hex_values
-        binary_data = binascii.unhexlify(''.join(hex_values))
         with open(output_path, 'wb') as f:
-            f.write(binary_data)
+            f.write(self.image.bin_data("mtpproduct"))
 
     def generate_binary_file_mtpfull(self, output_path):
         """Generate a binary file from the current values."""
-        trac_hex_values = self.trac_dataframe['Value'].dropna().apply(lambda x: f"{int(str(x), 16):X}".zfill(len(str(x)))).tolist()
-        acbi_hex_values = self.prod_dataframe['Value'].dropna().apply(lambda x: f"{int(str(x), 16):X}".zfill(len(str(x)))).tolist()
-        conf_hex_values = self.dataframe['Value'].dropna().apply(lambda x: f"{int(str(x), 16):02X}").tolist()
-        dusr_hex_values = self.dusr_dataframe['Value'].dropna().apply(lambda x: f"{int(str(x), 16):X}".zfill(len(str(x)))).tolist()
-        ovst_hex_values = self.ovst_dataframe['Value'].dropna().apply(lambda x: f"{int(str(x), 16):X}".zfill(len(str(x)))).tolist()
-        cali_hex_values = self.calibration_dataframe['Value'].dropna().apply(lambda x: f"{int(str(x), 16):X}".zfill(len(str(x)))).tolist()
-        spar_hex_values = ['00'] * 20
-        
         # 0x13000 ~ 0x131FF
-        first_half_hex_values = trac_hex_values + acbi_hex_values + dusr_hex_values + cali_hex_values + ovst_hex_values + conf_hex_values + spar_hex_values 
-        
-        # hex_values = first_half_hex_values * 2
-        hex_values = first_half_hex_values
-        binary_data = binascii.unhexlify(''.join(hex_values))
         with open(output_path, 'wb') as f:
-            f.write(binary_data)
+            f.write(self.image.bin_data("mtpfull"))
 
     def combine_xml(self,file1_path, Update_File_Path, output_path):
-        # Parse the first XML
-        # print(file1_path)
-        tree1 = ET.parse(file1_path)
-        root1 = tree1.getroot()  # The root element of file1
-    
-        # Parse the second XML
-        tree2 = ET.parse(Update_File_Path)
-        root2 = tree2.getroot()  # The root element of file2
-    
-        # Append all children from file2's root into file1's root
-        for child in root2:
-            root1.append(child)
-    
-        # Save the updated tree as a new XML
-        tree1.write(output_path, encoding="utf-8", xml_declaration=False)
-        # print(f"Combined XML written to {output_path}")
-    
-    
+        """Append the update XML to a generated Aardvark XML (see mtp_pipeline.combine_xml)."""
+        combine_xml(file1_path, Update_File_Path, output_path)
+
     def close_connection(self):
         """Close the database connection."""
         self.connection.close()
@@ -412,6 +402,120 @@ class DatabaseController:
             os.remove(self.modified_path)
  
 
+class VirtualTreeview:
+    """
+    Windowed view over a ttk.Treeview.
+
+    The Treeview only ever holds as many items as fit on screen; scrolling
+    re-fills those items from row_source(index) instead of inserting one
+    item per row, so a 1K MTP map and a 1MB code patch cost the same to show.
+    """
+    def __init__(self, tree, scrollbar):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.row_count = 0
+        self.row_source = None
+        self.first = 0
+        self.items = []
+
+        scrollbar.config(command=self.yview)
+        tree.bind("<Configure>", self._on_resize, add='+')
+        tree.bind("<MouseWheel>", self._on_wheel, add='+')
+        tree.bind("<Button-4>", lambda e: self.scroll(-3), add='+')
+        tree.bind("<Button-5>", lambda e: self.scroll(3), add='+')
+        self._resize(int(str(tree.cget('height')) or 10))
+
+    def set_source(self, row_count, row_source):
+        """Show a new set of rows; row_source(index) returns the values of one row."""
+        self.row_count = row_count
+        self.row_source = row_source
+        self.first = 0
+        self.refresh()
+
+    def clear(self):
+        self.set_source(0, None)
+
+    def refresh(self):
+        """Re-read every visible row from the source."""
+        for position, item_id in enumerate(self.items):
+            self._fill(item_id, self.first + position)
+        self._update_scrollbar()
+
+    def refresh_rows(self, indexes):
+        """Re-read only the given rows, skipping those scrolled out of view."""
+        for index in indexes:
+            position = index - self.first
+            if 0 <= position < len(self.items):
+                self._fill(self.items[position], index)
+
+    def index_of(self, item_id):
+        """Row index shown by a Treeview item, or None for a blank filler item."""
+        if item_id not in self.items:
+            return None
+        index = self.first + self.items.index(item_id)
+        return index if index < self.row_count else None
+
+    def see(self, index):
+        """Scroll so that row index is visible and return its item id."""
+        if index < self.first:
+            self._scroll_to(index)
+        elif index >= self.first + len(self.items):
+            self._scroll_to(index - len(self.items) + 1)
+        return self.items[index - self.first]
+
+    def scroll(self, rows):
+        self._scroll_to(self.first + rows)
+
+    def yview(self, *args):
+        """Scrollbar command: ('moveto', fraction) or ('scroll', n, 'units'|'pages')."""
+        if args[0] == 'moveto':
+            self._scroll_to(round(float(args[1]) * self.row_count))
+        elif args[0] == 'scroll':
+            step = len(self.items) if args[2] == 'pages' else 1
+            self.scroll(int(args[1]) * step)
+
+    def _scroll_to(self, first):
+        first = max(0, min(first, self.row_count - len(self.items)))
+        if first != self.first:
+            self.first = first
+            self.tree.selection_remove(self.tree.selection())
+            self.refresh()
+
+    def _fill(self, item_id, index):
+        values = self.row_source(index) if index < self.row_count else ()
+        self.tree.item(item_id, values=values)
+
+    def _update_scrollbar(self):
+        if self.row_count <= len(self.items):
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.first / self.row_count,
+                               (self.first + len(self.items)) / self.row_count)
+
+    def _resize(self, visible_rows):
+        """Grow or shrink the pool of Treeview items to visible_rows."""
+        visible_rows = max(1, visible_rows)
+        while len(self.items) < visible_rows:
+            self.items.append(self.tree.insert('', 'end', values=()))
+        if len(self.items) > visible_rows:
+            self.tree.delete(*self.items[visible_rows:])
+            del self.items[visible_rows:]
+        self.first = max(0, min(self.first, self.row_count - len(self.items)))
+
+    def _on_resize(self, event):
+        style = ttk.Style(self.tree)
+        row_height = int(style.lookup('Treeview', 'rowheight') or 20)
+        # One row is taken by the headings
+        visible_rows = event.height // row_height - 1
+        if visible_rows != len(self.items):
+            self._resize(visible_rows)
+            self.refresh()
+
+    def _on_wheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+        return "break"
+
+
 class ExcelGUI:
     """
     The main GUI for the MTP register editing application.
@@ -435,6 +539,8 @@ class ExcelGUI:
         self.controller = None
         self.last_bin_file = None
         self.last_xml_file = None
+        # (tab name, int MTP address) of the register shown in the description box
+        self.selected_register = None
         # A flag to prevent recursive calls when changing tabs
         self._syncing_tabs = False
 
@@ -538,13 +644,11 @@ class ExcelGUI:
                 tab_frame,
                 columns=("RAM Address",) + tuple(f"0x{i:02X}" for i in range(16)),
                 show='headings',
-                height=10,
-                yscrollcommand=tree_scrollbar_y.set
+                height=10
             )
             tree.pack(side='left', fill='both', expand=True)
     
             tree_scrollbar_y.pack(side='right', fill='y')
-            tree_scrollbar_y.config(command=tree.yview)
     
             # Define columns
             tree.heading("RAM Address", text="RAM Address")
@@ -555,6 +659,7 @@ class ExcelGUI:
                 tree.column(col_name, width=30, anchor='center')
     
             tab_frame.tree = tree
+            tab_frame.view = VirtualTreeview(tree, tree_scrollbar_y)
     
     def on_matrix_tab_change(self, event):
         """Callback when a tab is changed in the Matrix Notebook."""
@@ -569,68 +674,28 @@ class ExcelGUI:
         # Get the currently selected tab in the Matrix Notebook
         current_tab_name = self.matrix_notebook.tab(self.matrix_notebook.select(), "text")
         current_tab_frame = self.matrix_tabs[current_tab_name]
-        current_tree = current_tab_frame.tree
-    
-        # Clear the current tree
-        current_tree.delete(*current_tree.get_children())
-    
+
         # Define the start and end RAM addresses based on the tab
-        tab_ranges = {
-            "Tracking": (0x13000, 0x1300B),  # 0x13000 ~ 0x1300B
-            "Process Monitor Data": (0x13000, 0x1300F),  # 0x1300C ~ 0x1300F
-            "DUSR": (0x13010, 0x1314A),  # 0x13010 ~ 0x1314A
-            "CALIBRATION": (0x13140, 0x1315E),  # 0x13140 ~ 0x1315E
-            "OVST Flag": (0x13160, 0x13163),  # 0x1315F ~ 0x13163
-            "CONFIGURATION": (0x13160, 0x131EB),  # 0x13164 ~ 0x131EB
-            # "Redundancy Mirror": (0x13200, 0x133EB),  # 0x13200 ~ 0x133EB
-        }
-        start_address, end_address = tab_ranges.get(current_tab_name, (0, 0))
-    
-        # Create a dictionary for mapping RAM addresses to their data
-        matrix_data = {}
-        dataframe = None
-    
-        # Choose the appropriate dataframe based on the tab
-        if current_tab_name == "CONFIGURATION":
-            dataframe = self.controller.dataframe
-        elif current_tab_name == "DUSR":
-            dataframe = self.controller.dusr_dataframe
-        elif current_tab_name == "CALIBRATION":
-            dataframe = self.controller.calibration_dataframe
-        elif current_tab_name == "Tracking":
-            dataframe = self.controller.trac_dataframe
-        elif current_tab_name == "Process Monitor Data":
-            dataframe = self.controller.prod_dataframe
-        elif current_tab_name == "OVST Flag":
-            dataframe = self.controller.ovst_dataframe
-    
-        if dataframe is not None:
-            # Map RAM addresses to values, splitting multi-byte values
-            for _, row in dataframe.iterrows():
-                try:
-                    ram_address = int(row['MTP address'], 16) + (0x13000 - 0x7C00)
-                    value = row['Value']
-                    if pd.isna(value):
-                        continue
-                    
-                    # Ensure the value is in hexadecimal format
-                    hex_value = f"{int(value, 16):0{len(value)}X}"
-                    bytes_list = [hex_value[i:i + 2] for i in range(0, len(hex_value), 2)]
-    
-                    for i, byte in enumerate(bytes_list):
-                        column = (ram_address + i) % 16
-                        row_key = ((ram_address + i) // 16) * 16
-                        if row_key not in matrix_data:
-                            matrix_data[row_key] = [""] * 16
-                        matrix_data[row_key][column] = byte.upper()
-                except (ValueError, TypeError):
-                    continue
+        start_address, end_address = MATRIX_RANGES.get(current_tab_name, (0, 0))
+        row_addresses = range(start_address, end_address + 0x10, 0x10)
     
-        # Populate the Treeview, including empty rows for missing addresses
-        for address in range(start_address, end_address + 0x10, 0x10):
-            row_label = f"0x{address:05X}"
-            row_values = matrix_data.get(address, [""] * 16)
-            current_tree.insert('', 'end', values=[row_label] + row_values)
+        # Rows are sliced straight out of the controller's MTP image when they
+        # scroll into view, showing only the bytes that belong to this tab and
+        # hold a value (empty rows for missing addresses)
+        image = self.controller.mtp_image
+        valid = self.controller.image_valid
+        tab_start, tab_end = self.controller.tab_spans.get(current_tab_name, (0, 0))
+
+        def matrix_row(index):
+            address = row_addresses[index]
+            offset = address - MTP_RAM_BASE
+            row_values = [
+                f"{image[i]:02X}" if tab_start <= i < tab_end and i < MTP_IMAGE_SIZE and valid[i] else ""
+                for i in range(offset, offset + 16)
+            ]
+            return [f"0x{address:05X}"] + row_values
+
+        current_tab_frame.view.set_source(len(row_addresses), matrix_row)
 
     def create_description_box(self):
         description_box = ttk.LabelFrame(self.root, text=" Description Detail")
@@ -644,6 +709,7 @@ class ExcelGUI:
         self.description_tree.heading("Description", text="Description")
         self.description_tree.column("Description", width=520, minwidth=200, stretch=True)
         self.description_tree.pack(side='left', fill='both', expand=True)
+        self.description_tree.bind("<Double-1>", self.make_field_editable)
 
         description_scrollbar.pack(side='right', fill='y')
         description_box.rowconfigure(0, weight=1)
@@ -720,7 +786,7 @@ class ExcelGUI:
 
     def _add_treeview_to_tab(self, frame):
         tree_scrollbar = ttk.Scrollbar(frame, orient='vertical')
-        tree = ttk.Treeview(frame, columns=("Register Name", "MTP Address", "RAM Address", "Byte", "Value"), show='headings', yscrollcommand=tree_scrollbar.set)
+        tree = ttk.Treeview(frame, columns=("Register Name", "MTP Address", "RAM Address", "Byte", "Value"), show='headings')
         for col in ["Register Name", "MTP Address", "RAM Address", "Byte", "Value"]:
             tree.heading(col, text=col)
             if col == "Register Name": 
@@ -732,9 +798,9 @@ class ExcelGUI:
             else: 
                 tree.column(col, width=100, anchor='center')
         tree.pack(side='left', fill='both', expand=True)
-        tree_scrollbar.config(command=tree.yview)
         tree_scrollbar.pack(side='right', fill='y')
         frame.tree = tree
+        frame.view = VirtualTreeview(tree, tree_scrollbar)
 
         tree.bind("<ButtonRelease-1>", self.on_register_select)
         tree.bind("<Double-1>", self.make_value_editable)
@@ -751,32 +817,71 @@ class ExcelGUI:
         if selected_address and selected_address.startswith("0x"):
             address = selected_address[2:]
     
-            self.description_tree.delete(*self.description_tree.get_children())
-    
-            # Select the appropriate description dataframe based on the tab
-            if tab_name == "CONFIGURATION":
-                description_df = self.controller.dataframe
-            elif tab_name == "DUSR":
-                description_df = self.controller.dusr_dataframe
-            elif tab_name == "CALIBRATION":
-                description_df = self.controller.calibration_dataframe
-            elif tab_name == "Tracking":
-                description_df = self.controller.trac_dataframe
-            elif tab_name == "Process Monitor Data":
-                description_df = self.controller.prod_dataframe
-            elif tab_name == "OVST Flag":
-                description_df = self.controller.ovst_dataframe
-            else:
-                description_df = None
-    
-            if description_df is not None:
-                # Filter by MTP address
-                # description = description_df[description_df['MTP address'].str.upper() == address.upper()]
-                description = description_df[description_df['MTP address'].str.upper() == address.upper()]
-                description = description.sort_values(by='index', ascending=True)
+            self.selected_register = (tab_name, int(address, 16))
+            self.populate_description()
+
+    def populate_description(self):
+        """Show the sub-fields of the selected register, with their decoded values."""
+        self.description_tree.delete(*self.description_tree.get_children())
+        tab_name, address = self.selected_register
 
-                for _, row in description.iterrows():
-                    self.description_tree.insert('', 'end', values=(row['Sub Field Name'], row['Description']))
+        # Select the appropriate description dataframe based on the tab
+        description_df = self.controller.get_dataframe(tab_name)
+
+        if description_df is not None:
+            # Rows for this MTP address, already in DB order
+            description = description_df.loc[self.controller.rows_at(tab_name, address)]
+            field_values = self.controller.unpack_fields(address)
+
+            for (_, row), (_, field_value) in zip(description.iterrows(), field_values):
+                name = row['Sub Field Name'] if field_value is None else f"{row['Sub Field Name']} = 0x{field_value:X}"
+                self.description_tree.insert('', 'end', values=(name, row['Description']))
+
+    def make_field_editable(self, event):
+        """
+        Double-clicking a sub-field in the description box edits that sub-field
+        only; the other bits of the register are kept (see pack_fields).
+        """
+        if not self.controller or not self.selected_register:
+            return
+        item_id = self.description_tree.identify_row(event.y)
+        bbox = self.description_tree.bbox(item_id, "#1") if item_id else None
+        if not bbox:
+            return
+
+        _, address = self.selected_register
+        _, name, shift, mask = self.controller.field_layout[address][3][self.description_tree.index(item_id)]
+        max_val = mask >> shift
+        hex_length = (max_val.bit_length() + 3) // 4
+        field_value = dict(self.controller.unpack_fields(address))[name]
+
+        x, y, width, height = bbox
+        entry = tk.Entry(self.description_tree, justify='center')
+        entry.place(x=x, y=y, width=width, height=min(height, 24))
+        entry.insert(0, "" if field_value is None else f"{field_value:X}")
+        entry.select_range(0, tk.END)
+        entry.focus()
+
+        def save_field(*args):
+            if not entry.winfo_exists():
+                return
+            new_value = entry.get().strip().upper()
+            entry.destroy()
+            if new_value.startswith("0X"):
+                new_value = new_value[2:]
+            try:
+                int_value = int(new_value, 16)
+                if not 0 <= int_value <= max_val:
+                    raise ValueError
+            except ValueError:
+                messagebox.showerror("Invalid Input", f"{name} must be a valid HEX within {hex_length} hex digits (0x{max_val:X}).")
+                return
+            # The register row and matrix cells are patched by on_image_change
+            self.controller.pack_fields(address, {name: int_value})
+            self.populate_description()
+
+        entry.bind("<Return>", save_field)
+        entry.bind("<FocusOut>", lambda e: save_field())
 
     def on_matrix_select(self, event):
         """When a cell in the matrix is clicked, highlight the corresponding entry in the CONFIGURATION tab."""
@@ -872,13 +977,10 @@ class ExcelGUI:
                 # Zero-pad to the required hex length
                 formatted_value = f"{int_value:0{hex_length}X}"
     
-                tree.item(item_id, values=current_values[:column_index] + [formatted_value] + current_values[column_index+1:])
                 if self.controller:
                     address = current_values[1].replace("0x", "")
+                    # The register row and matrix cells are patched by on_image_change
                     self.controller.update_value(tab_name, address, formatted_value)
-                    # Update matrix tab changed
-                    if tab_name == "CONFIGURATION" or "DUSR" or "CALIBRATION" or "Tracking" or "Process Monitor Data" or "OVST Flag":
-                        self.populate_matrix_tree()
                 entry.destroy()
     
             entry.bind("<Return>", save_value)
@@ -890,6 +992,7 @@ class ExcelGUI:
         try:
             # self.controller = ExcelController(self.filepath)
             self.controller = DatabaseController(self.filepath)
+            self.controller.change_listeners.append(self.on_image_change)
             self.populate_treeview()
             self.connect_btn.config(text='Connected')
             self.led_canvas.itemconfig(self.led_id, fill='green')
@@ -907,14 +1010,15 @@ class ExcelGUI:
     
             # Clear register box data
             for tab in self.tabs.values():
-                tab.tree.delete(*tab.tree.get_children())
+                tab.view.clear()
     
             # Clear description tree
             self.description_tree.delete(*self.description_tree.get_children())
+            self.selected_register = None
     
             # Clear matrix data for all tabs
             for tab_frame in self.matrix_tabs.values():
-                tab_frame.tree.delete(*tab_frame.tree.get_children())
+                tab_frame.view.clear()
 
 
     def connect(self):
@@ -952,40 +1056,31 @@ class ExcelGUI:
             if self.controller:
                 try:
                     self.controller.calculate_crc_for_conf_range()
-                    self.populate_treeview()
                 except Exception as e:
                     messagebox.showerror('Error', f'Failed to calculate CRC: {e}')
         if tab_name == "DUSR":
             if self.controller:
                 try:
                     self.controller.calculate_crc_for_DUSR_range()
-                    self.populate_treeview()
                 except Exception as e:
                     messagebox.showerror('Error', f'Failed to calculate CRC: {e}')
         if tab_name == "CALIBRATION":
             if self.controller:
                 try:
                     self.controller.calculate_crc_for_cali_range()
-                    self.populate_treeview()
                 except Exception as e:
                     messagebox.showerror('Error', f'Failed to calculate CRC: {e}')
         if tab_name == "Tracking":
             if self.controller:
                 try:
                     self.controller.calculate_crc_for_trac_range()
-                    self.populate_treeview()
                 except Exception as e:
                     messagebox.showerror('Error', f'Failed to calculate CRC: {e}')
 
     def calculate_all_crc(self):
         if self.controller:
             try:
-                self.controller.calculate_crc_for_conf_range()
-                self.controller.calculate_crc_for_DUSR_range()
-                self.controller.calculate_crc_for_cali_range()
-                self.controller.calculate_crc_for_trac_range()
-                
-                self.populate_treeview()
+                self.controller.calculate_all_crc()
             except Exception as e:
                 messagebox.showerror('Error', f'Failed to calculate CRC: {e}')
         
@@ -996,28 +1091,24 @@ class ExcelGUI:
             if self.controller:
                 try:
                     self.controller.clear_crc("CONFIGURATION")
-                    self.populate_treeview()
                 except Exception as e:
                     messagebox.showerror('Error', f'Failed to clear CRC: {e}')
         if tab_name == "DUSR":
             if self.controller:
                 try:
                     self.controller.clear_crc("DUSR")
-                    self.populate_treeview()
                 except Exception as e:
                     messagebox.showerror('Error', f'Failed to clear CRC: {e}')
         if tab_name == "CALIBRATION":
             if self.controller:
                 try:
                     self.controller.clear_crc("CALIBRATION")
-                    self.populate_treeview()
                 except Exception as e:
                     messagebox.showerror('Error', f'Failed to clear CRC: {e}')
         if tab_name == "Tracking":
             if self.controller:
                 try:
                     self.controller.clear_crc("Tracking")
-                    self.populate_treeview()
                 except Exception as e:
                     messagebox.showerror('Error', f'Failed to clear CRC: {e}')
 
@@ -1025,64 +1116,63 @@ class ExcelGUI:
         messagebox.showerror('HELP', 'Please Contact Caesal Cheng immediately')
 
     def populate_treeview(self):
-        """Populate the treeviews for CONFIGURATION, DUSR, and CALIBRATION tabs."""
+        """
+        Point every register tab and the matrix at the controller's data.
+        Rows are only formatted when they scroll into view.
+        """
         if self.controller:
-            # Clear all tabs first
-            for tab_name, tab in self.tabs.items():
-                tab.tree.delete(*tab.tree.get_children())
-
-            # Populate the matrix tree from the CONFIGURATION data
+            # Populate the matrix tree for the selected tab
             self.populate_matrix_tree()
 
-            # Populate CONFIGURATION tab
-            self._populate_tab_tree("CONFIGURATION", self.controller.dataframe)
-
-            # Populate DUSR tab
-            self._populate_tab_tree("DUSR", self.controller.dusr_dataframe)
-
-            # Populate CALIBRATION tab
-            self._populate_tab_tree("CALIBRATION", self.controller.calibration_dataframe)
-
-            # Populate Tracking tab
-            self._populate_tab_tree("Tracking", self.controller.trac_dataframe)
-
-            # Populate Process Monitor Data tab
-            self._populate_tab_tree("Process Monitor Data", self.controller.prod_dataframe)
-            
-            # Populate OVST tab
-            self._populate_tab_tree("OVST Flag", self.controller.ovst_dataframe)
+            for tab_name in self.tabs:
+                self._populate_tab_tree(tab_name)
 
-    def _populate_tab_tree(self, tab_name, dataframe):
-        grouped_data = dataframe.groupby('MTP address')
+    def _populate_tab_tree(self, tab_name):
+        registers = []
         last_register_name = None
     
-        for address, group in grouped_data:
-            register_name = group['Record Field'].iloc[0]
-    
+        for address, register_name, field_width in self.controller.register_rows(tab_name):
             # If register name is empty but there's a previous one, reuse it
             if pd.isna(register_name) and last_register_name is not None:
                 register_name = last_register_name
             else:
                 last_register_name = register_name
     
-            # For Value, if empty, show a blank string
-            vals = group['Value'].dropna().unique().astype(str)
-            value = ', '.join(vals) if len(vals) > 0 else ""
-    
             if tab_name == "CONFIGURATION":
                 Byte = 1
             else:
-                field_width = group['Field width'].iloc[0] if 'Field width' in group.columns and not pd.isna(group['Field width'].iloc[0]) else 8
-                # print(field_width)
-                Byte = int(field_width) 
-    
-            mtp_address_display = f"0x{address}"
-            address_int = int(address, 16)
-            actual_location = address_int + (0x13000 - 0x7C00)
-            ram_address_display = f"0x{actual_location:05X}"
+                Byte = int(field_width) if not pd.isna(field_width) else 8
     
-            self.tabs[tab_name].tree.insert('', 'end', 
-                values=(register_name, mtp_address_display, ram_address_display, Byte, value))
+            mtp_address_display = f"0x{address:04X}"
+            ram_address_display = f"0x{address - MTP_ADDR_BASE + MTP_RAM_BASE:05X}"
+            registers.append((register_name, mtp_address_display, ram_address_display, Byte, address))
+
+        def register_row(index):
+            register_name, mtp_address_display, ram_address_display, Byte, address = registers[index]
+            # Whole register decoded from the MTP image; blank if it holds no value
+            value = self.controller.register_hex(address)
+            return (register_name, mtp_address_display, ram_address_display, Byte, value)
+
+        self.tabs[tab_name].view.set_source(len(registers), register_row)
+        self.tabs[tab_name].register_rows = {register[4]: index for index, register in enumerate(registers)}
+
+    def on_image_change(self, address, old_bytes, new_bytes):
+        """
+        Controller change event: re-read only the register rows and matrix
+        rows covering MTP address..address+len-1.
+        """
+        addresses = range(address, address + max(len(old_bytes), len(new_bytes), 1))
+
+        for tab in self.tabs.values():
+            register_rows = getattr(tab, 'register_rows', {})
+            tab.view.refresh_rows(register_rows[a] for a in addresses if a in register_rows)
+
+        current_tab_name = self.matrix_notebook.tab(self.matrix_notebook.select(), "text")
+        start_address, _ = MATRIX_RANGES.get(current_tab_name, (0, 0))
+        ram_offset = MTP_RAM_BASE - MTP_ADDR_BASE - start_address
+        self.matrix_tabs[current_tab_name].view.refresh_rows(
+            sorted({(a + ram_offset) // 0x10 for a in addresses})
+        )
 
 
     def generate(self):
@@ -1117,29 +1207,19 @@ class ExcelGUI:
             selected_option = self.option_var.get()
 
             # Determine output based on selected option
-            if selected_option == "mtpfull":
-                output_bin = "MTP_DATA_1K_Converted.bin"
-                output_xml = "mtp_batch.xml"
-            elif selected_option == "mtpproduct":
-                output_bin = "MTP_DATA_1K_ProductConverted.bin"
-                output_xml = "mtp_Product_batch.xml"
-            else:
-                output_bin = "MTP_DATA_1K_ConfigConverted.bin"
-                output_xml = "mtp_Config_batch.xml"
-
-            command = [
-                "python", 
-                "modify_binary_file_01062025.py", 
-                f"type={selected_option}", 
-                "input=MTP_DATA_1K.bin", 
-                f"output={output_bin}", 
-                f"xml={output_xml}",
-                "eng=indie"
-            ]
+            output_bin, output_xml = OUTPUT_NAMES.get(selected_option, OUTPUT_NAMES["mtpconfig"])
+
+            # Convert in-process instead of starting a new interpreter
             try:
-                subprocess.run(command, cwd=bin_dir, check=True, env={**os.environ, "NO_GUI_REOPEN": "1"})
+                modify_binary_file(
+                    selected_option,
+                    self.last_bin_file,
+                    os.path.join(bin_dir, output_bin),
+                    os.path.join(bin_dir, output_xml),
+                    engineer="indie"
+                )
                 # messagebox.showinfo("Success", f"XML file generated successfully with {selected_option}.")
-            except subprocess.CalledProcessError as e:
+            except Exception as e:
                 messagebox.showerror("Error", f"Failed to generate XML: {e}")
         else:
             messagebox.showerror("Error", "Please generate a binary file first.")
@@ -1148,15 +1228,8 @@ class ExcelGUI:
             timestamp = datetime.now().strftime('%m%d%Y_%H%M%S')
             bin_dir = os.path.dirname(self.last_bin_file)
             selected_option = self.option_var.get()
+            _, output_xml = OUTPUT_NAMES.get(selected_option, OUTPUT_NAMES["mtpconfig"])
 
-            # Determine output based on selected option
-            if selected_option == "mtpfull":
-                output_xml = r"mtp_batch.xml"
-            elif selected_option == "mtpproduct":
-                output_xml = r"mtp_Product_batch.xml"
-            else:
-                output_xml = r"mtp_Config_batch.xml"
-                
             output_path = filedialog.asksaveasfilename(
                 defaultextension='.xml',
                 filetypes=[("XML files", "*.xml")],
@@ -0,0 +1,42 @@
+# -*- mode: python ; coding: utf-8 -*-
+# pyinstaller MTP_Alchemist_0.1.05.spec (from this folder)
+# The shared MTP modules come from ../Script; they are listed as hidden imports so
+# the frozen app bundles them even where the sirius-tools package is not installed.
+
+
+a = Analysis(
+    ['MTP_Alchemist_0.1.05.py'],
+    pathex=['../Script'],
+    binaries=[],
+    datas=[('../Script/MTPDATA_update_execute.xml', '.'), ('snorlax.ico', '.')],
+    hiddenimports=['crc16', 'i2c_batch', 'modify_binary_file_01062025', 'mtp_pipeline', 'xml_verify'],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=[],
+    noarchive=False,
+    optimize=0,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    a.binaries,
+    a.datas,
+    [],
+    name='MTP_Alchemist_0.1.05',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=True,
+    upx_exclude=[],
+    runtime_tmpdir=None,
+    console=True,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon=['snorlax.ico'],
+)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 09:20:15 2026
+
+Tests for the MTP Alchemist DatabaseController (run with pytest from this folder).
+"""
+
+import importlib.util
+import os
+import shutil
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DB_FILE = os.path.join(HERE, os.pardir, "SiriusA2_MTPRegisterSpecification.db")
+
+spec = importlib.util.spec_from_file_location("mtp_alchemist", os.path.join(HERE, "MTP_Alchemist_0.1.05.py"))
+mtp_alchemist = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mtp_alchemist)
+
+
+@pytest.fixture
+def controller(tmp_path):
+    db_path = tmp_path / "SiriusA2_MTPRegisterSpecification.db"
+    shutil.copy(DB_FILE, db_path)
+    controller = mtp_alchemist.DatabaseController(str(db_path))
+    yield controller
+    controller.close_connection()
+
+
+def test_odd_length_value(controller):
+    controller.update_value("Tracking", "7C06", "1")
+    offset = 0x7C06 - mtp_alchemist.MTP_ADDR_BASE
+    assert controller.mtp_image[offset] == 0x01
+    assert controller.image_valid[offset]
+    assert controller.register_hex(0x7C06) == "01"
+
+
+def test_pack_fields_keeps_other_sub_fields(controller):
+    # 0x7D6B: MTP_SPARE_CONFIG0_B6b5_0 [5:0] = 0x00, MTP_DPRX_AUX2I2C_SPEED [7:6] = 0x1 (value 40)
+    controller.pack_fields(0x7D6B, {"MTP_SPARE_CONFIG0_B6b5_0 [5:0]": 0x2A})
+    assert controller.register_hex(0x7D6B) == "6A"
+    assert controller.unpack_fields(0x7D6B) == [
+        ("MTP_SPARE_CONFIG0_B6b5_0 [5:0]", 0x2A),
+        ("MTP_DPRX_AUX2I2C_SPEED [7:6]", 0x1),
+    ]
+
+
+def db_values(controller):
+    return dict(controller.connection.execute(f'SELECT "index", value FROM {mtp_alchemist.SQL_TABLE};'))
+
+
+def test_save_changes_writes_only_dirty_rows(controller):
+    before = db_values(controller)
+    rows = [controller.rows_at("Tracking", address)[0] for address in ("7C06", "7C07")]
+    df = controller.get_dataframe("Tracking")
+    indexes = [int(df.at[row, 'index']) for row in rows]
+    controller._set_value("Tracking", rows[0], "5A")
+    controller._set_value("Tracking", rows[1], "A5")
+    # Edits stay in memory until saved
+    assert db_values(controller) == before
+    assert controller._dirty_rows == {indexes[0]: "5A", indexes[1]: "A5"}
+
+    controller.save_changes()
+    after = db_values(controller)
+    assert controller._dirty_rows == {}
+    assert {index for index in before if before[index] != after[index]} == set(indexes)
+    assert [after[index] for index in indexes] == ["5A", "A5"]
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:12:31 2026
+
+CRC16 engine shared by MTP Alchemist, modify_binary_file, the Aardvark
+controller and ISP over I2C.
+
+This is the only copy: the other tools import it as an installed module
+(pip install -e . from the repository root, see pyproject.toml).
+
+Sirius/Jaguar firmware uses CRC-CCITT (poly 0x1021, MSB first, no final XOR)
+seeded with 0x1021 instead of the usual 0xFFFF.
+"""
+
+import binascii
+
+CRC16_POLY = 0x1021
+CRC16_INIT = 0x1021
+
+
+def _build_table(poly):
+    """Build the 256-entry lookup table for an MSB-first CRC16."""
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = ((crc << 1) ^ poly) & 0xFFFF
+            else:
+                crc = (crc << 1) & 0xFFFF
+        table.append(crc)
+    return tuple(table)
+
+
+CRC16_TABLE = _build_table(CRC16_POLY)
+
+
+def crc16_bitwise(data, crc: int = CRC16_INIT, poly: int = CRC16_POLY) -> int:
+    """Reference bit-at-a-time implementation (the original firmware C loop)."""
+    for byte in data:
+        for _ in range(8):
+            flag = byte ^ (crc >> 8)
+            crc = (crc << 1) & 0xFFFF
+            if flag & 0x80:
+                crc ^= poly
+            byte <<= 1
+    return crc
+
+
+def crc16_table(data, crc: int = CRC16_INIT, table=CRC16_TABLE) -> int:
+    """Table-driven implementation, one lookup per byte."""
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ table[(crc >> 8) ^ byte]
+    return crc
+
+
+def crc16(data, crc: int = CRC16_INIT, poly: int = CRC16_POLY) -> int:
+    """
+    Compute the CRC16 of a bytes-like object.
+
+    Uses binascii.crc_hqx (C implementation of the same polynomial) when
+    poly is 0x1021, otherwise falls back to a table built for poly.
+    """
+    if poly == CRC16_POLY:
+        return binascii.crc_hqx(data, crc)
+    return crc16_table(data, crc, _build_table(poly))
+
+
+def crc16_hex(text: str, crc: int = CRC16_INIT, poly: int = CRC16_POLY) -> int:
+    """Compute the CRC16 of a hex string, ignoring any whitespace."""
+    return crc16(bytes.fromhex("".join(text.split())), crc, poly)
+
+
+class CRC16:
+    """Streaming CRC16, for data that arrives in chunks."""
+
+    def __init__(self, data=b"", crc: int = CRC16_INIT, poly: int = CRC16_POLY):
+        self.poly = poly
+        self.crc = crc
+        if data:
+            self.update(data)
+
+    def update(self, data):
+        """Feed more bytes into the running CRC."""
+        self.crc = crc16(data, self.crc, self.poly)
+        return self
+
+    def copy(self):
+        return CRC16(crc=self.crc, poly=self.poly)
+
+    def digest(self) -> bytes:
+        """Return the CRC as 2 big-endian bytes."""
+        return self.crc.to_bytes(2, "big")
+
+    def hexdigest(self) -> str:
+        return f"{self.crc:04X}"
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 09:37:15 2026
+
+Binary I2C batch format, written next to the Aardvark XML by
+modify_binary_file (sidecar=1) and replayed by AardvarkController without
+any text parsing.
+
+Installed with the other shared modules (pip install -e . from the
+repository root, see pyproject.toml), so both tools use this one copy.
+
+Layout (little endian):
+    header  b"I2CBATCH" + version (u16) + reserved (u16)
+    record  op (u8), 7-bit slave address (u8), flags (u8), pad (u8), arg (u32)
+            OP_WRITE: arg = data length, followed by the data bytes
+            OP_READ:  arg = byte count
+            OP_SLEEP: arg = milliseconds
+"""
+
+import mmap
+import struct
+
+BATCH_MAGIC = b"I2CBATCH"
+BATCH_VERSION = 1
+BATCH_HEADER = struct.Struct('<8sHH')
+BATCH_RECORD = struct.Struct('<BBBxI')
+
+OP_WRITE = 1
+OP_READ = 2
+OP_SLEEP = 3
+
+FLAG_NOSTOP = 0x01
+
+
+def transfer_ms(nbytes: int, bitrate: float) -> float:
+    """Bus time of one I2C transaction of nbytes data bytes at bitrate kHz."""
+    # START + address byte + data bytes (8 bits + ACK each) + STOP
+    bits = 1 + 9 * (1 + nbytes) + 1
+    return bits / bitrate
+
+
+class BatchWriter:
+    """Append write/read/sleep records to a binary batch file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.f = open(path, 'wb')
+        self.f.write(BATCH_HEADER.pack(BATCH_MAGIC, BATCH_VERSION, 0))
+
+    def write(self, addr, data, nostop=False):
+        self.f.write(BATCH_RECORD.pack(OP_WRITE, addr, FLAG_NOSTOP if nostop else 0, len(data)))
+        self.f.write(data)
+
+    def read(self, addr, count):
+        self.f.write(BATCH_RECORD.pack(OP_READ, addr, 0, count))
+
+    def sleep(self, ms):
+        self.f.write(BATCH_RECORD.pack(OP_SLEEP, 0, 0, ms))
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_batch(path):
+    """
+    Yield (op, addr, flags, arg) for every record of a binary batch file,
+    memory-mapped rather than read. arg is the data for OP_WRITE, the byte
+    count for OP_READ and milliseconds for OP_SLEEP.
+
+    Write data is a zero-copy memoryview into the mapping, released when
+    the next record is read: copy it (bytes(arg)) to keep it.
+    """
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        magic, version, _ = BATCH_HEADER.unpack_from(mm, 0)
+        if magic != BATCH_MAGIC or version != BATCH_VERSION:
+            raise ValueError(f"{path} is not a version {BATCH_VERSION} I2C batch file")
+
+        # Every view must be released before the mmap can close
+        view = memoryview(mm)
+        try:
+            pos = BATCH_HEADER.size
+            size = len(mm)
+            while pos < size:
+                op, addr, flags, arg = BATCH_RECORD.unpack_from(mm, pos)
+                pos += BATCH_RECORD.size
+                if op == OP_WRITE:
+                    if pos + arg > size:
+                        raise ValueError(f"{path}: truncated write record at offset {pos - BATCH_RECORD.size}")
+                    data = view[pos:pos + arg]
+                    try:
+                        yield op, addr, flags, data
+                    finally:
+                        data.release()
+                    pos += arg
+                elif op in (OP_READ, OP_SLEEP):
+                    yield op, addr, flags, arg
+                else:
+                    raise ValueError(f"{path}: unknown op {op} at offset {pos - BATCH_RECORD.size}")
+        finally:
+            view.release()
@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Oct 23 13:52:26 2026
+
+I2C transports for AardvarkController and ISP over I2C.
+
+Installed with the other shared modules (pip install -e . from the
+repository root, see pyproject.toml) and imported by both tools.
+
+I2CTransport is the interface (open/configure/write/read/write_read/delay/
+close). AardvarkTransport drives a real Aardvark through aardvark_py;
+SimulatedTransport runs the same calls against in-process devices on a
+virtual clock, so batch replay, ISP flashing and MTP programming can run
+and be timed without hardware:
+
+    bus = SimulatedTransport(bitrate=400)
+    sirius = bus.attach(0x37, DDC2BIDevice(busy_ms=2))
+    aardvark = AardvarkController(0x37, transport=bus)
+    aardvark.open()
+    aardvark.execute_MTP_batch_file("mtp_batch.xml")
+    print(bus.elapsed_ms, sirius.read_memory(0x13000, 0x200))
+"""
+
+import struct
+import time
+from array import array
+
+from crc16 import crc16
+from i2c_batch import transfer_ms
+
+DDC2BI_SOURCE = 0x51
+# Status read back after a DDC2BI write: bytes 5, 6 = 03 0C (ACK) / 03 0B (NACK),
+# byte 1 = 0x80 while the device is busy
+DDC2BI_ACK = bytes([0x6E, 0x88, 0x02, 0x00, 0x00, 0x03, 0x0C, 0x00])
+DDC2BI_NACK = bytes([0x6E, 0x88, 0x02, 0x00, 0x00, 0x03, 0x0B, 0x00])
+DDC2BI_BUSY = bytes([0x6E, 0x80, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00])
+# Fast write opcodes (03 10 / 03 11): a block follows, addr + size + data + 00 00 CRC16
+DDC2BI_FAST_WRITE = ((0x03, 0x10), (0x03, 0x11))
+# aardvark_py AA_I2C_STATUS_SLA_NACK: the slave address was not acknowledged
+I2C_STATUS_SLA_NACK = 3
+
+
+class I2CTransport:
+    """
+    I2C master interface. write() returns the number of bytes written
+    (negative on error), read() and write_read() return (count, bytes);
+    write_read() returns a negative count on error (-I2C status code).
+    """
+
+    def __init__(self, bitrate=400):
+        self.bitrate = bitrate
+        self.is_open = False
+
+    def open(self):
+        raise NotImplementedError
+
+    def configure(self):
+        """Apply self.bitrate; returns the bitrate actually set (kHz)."""
+        raise NotImplementedError
+
+    def write(self, addr, data, nostop=False):
+        raise NotImplementedError
+
+    def read(self, addr, count):
+        raise NotImplementedError
+
+    def write_read(self, addr, data, count):
+        """Write data then read count bytes with a repeated start in between."""
+        raise NotImplementedError
+
+    def delay(self, ms):
+        """Wait ms milliseconds between transactions."""
+        time.sleep(ms / 1000)
+
+    def close(self):
+        self.is_open = False
+
+
+class AardvarkTransport(I2CTransport):
+    """
+    Total Phase Aardvark over aardvark_py. port opens that port directly;
+    unique_id / re_open pick a device the way ISP over I2C always has.
+    """
+
+    def __init__(self, bitrate=400, port=0, unique_id=-1, re_open=False, pullup=True, target_power=True):
+        super().__init__(bitrate)
+        self.port = port
+        self.unique_id = unique_id
+        self.re_open = re_open
+        self.pullup = pullup
+        self.target_power = target_power
+        self.handle = None
+        self.aa = None
+
+    def _find_handle(self):
+        aa = self.aa
+        if self.unique_id == -1 and not self.re_open:
+            return aa.aa_open(self.port)
+
+        (num, ports, unique_ids) = aa.aa_find_devices_ext(16, 16)
+        if num == 0:
+            raise RuntimeError("Aardvark I2C is not connected!!")
+        for port, u_id in zip(ports, unique_ids):
+            if self.unique_id == -1 or self.unique_id == u_id:
+                if self.re_open and port >= 0x8000:
+                    # Already open (e.g. by a crashed session): reuse its handle
+                    for h in range(1, 100):
+                        if port & 0x7FFF == aa.aa_port(h):
+                            return h
+                    raise RuntimeError("Failed to re-open aardvark I2c")
+                elif port < 0x8000:
+                    return aa.aa_open(port)
+        raise RuntimeError("No available aardvark I2C, Plase check <re_open> or <unique_id>")
+
+    def open(self):
+        import aardvark_py
+        self.aa = aardvark_py
+
+        handle = self._find_handle()
+        if handle <= 0:
+            raise RuntimeError("Error: Unable to open Aardvark device.")
+        self.handle = handle
+        self.is_open = True
+        self.configure()
+
+    def configure(self):
+        aa = self.aa
+        aa.aa_configure(self.handle, aa.AA_CONFIG_SPI_I2C)
+        self.bitrate = aa.aa_i2c_bitrate(self.handle, self.bitrate)
+        if self.pullup:
+            aa.aa_i2c_pullup(self.handle, aa.AA_I2C_PULLUP_BOTH)
+        if self.target_power:
+            aa.aa_target_power(self.handle, aa.AA_TARGET_POWER_BOTH)
+        return self.bitrate
+
+    def write(self, addr, data, nostop=False):
+        aa = self.aa
+        flags = aa.AA_I2C_NO_STOP if nostop else aa.AA_I2C_NO_FLAGS
+        return aa.aa_i2c_write(self.handle, addr, flags, array('B', data))
+
+    def read(self, addr, count):
+        aa = self.aa
+        num_read, data_in = aa.aa_i2c_read(self.handle, addr, aa.AA_I2C_NO_FLAGS, count)
+        return num_read, bytes(data_in[:max(num_read, 0)])
+
+    def write_read(self, addr, data, count):
+        aa = self.aa
+        status, num_written, data_in, num_read = aa.aa_i2c_write_read(
+            self.handle, addr, aa.AA_I2C_NO_FLAGS, array('B', data), count)
+        if status != 0:
+            # I2C status codes are positive, aardvark_py errors already negative
+            return -abs(status), b""
+        return num_read, bytes(data_in[:num_read])
+
+    def close(self):
+        if self.handle is not None:
+            self.aa.aa_close(self.handle)
+            self.handle = None
+        self.is_open = False
+
+
+class RegisterFile:
+    """Simulated register device: the first byte written sets the register pointer, which auto-increments."""
+
+    def __init__(self, size=256, fill=0x00):
+        self.registers = bytearray([fill]) * size
+        self.pointer = 0
+
+    def write(self, data, now_ms):
+        if not data:
+            return True
+        self.pointer = data[0] % len(self.registers)
+        for value in data[1:]:
+            self.registers[self.pointer] = value
+            self.pointer = (self.pointer + 1) % len(self.registers)
+        return True
+
+    def read(self, count, now_ms):
+        data = bytearray(count)
+        for i in range(count):
+            data[i] = self.registers[self.pointer]
+            self.pointer = (self.pointer + 1) % len(self.registers)
+        return bytes(data)
+
+
+class DDC2BIDevice:
+    """
+    Simulated Sirius DDC2BI slave. Accepts the commands MTP programming and
+    ISP send: plain commands are ACKed; a fast write (03 10 / 03 11) takes
+    a block of address + size + data + 00 00 CRC16, in the same transaction
+    (modify_binary_file) or the next one (FastFlashWrite). Blocks with a good
+    CRC land in a sparse memory; a bad block is NACKed. After each block the
+    device reports busy for busy_ms.
+    """
+    PAGE = 0x1000
+
+    def __init__(self, busy_ms=0.0):
+        self.busy_ms = busy_ms
+        self.busy_until = 0.0
+        self.status = DDC2BI_ACK
+        self.block_pending = False
+        self.pages = {}
+        self.blocks = 0
+        self.commands = 0
+
+    def _store(self, address, data):
+        pos = 0
+        while pos < len(data):
+            page, offset = divmod(address + pos, self.PAGE)
+            size = min(self.PAGE - offset, len(data) - pos)
+            buffer = self.pages.setdefault(page, bytearray(self.PAGE))
+            buffer[offset:offset + size] = data[pos:pos + size]
+            pos += size
+
+    def read_memory(self, address, size):
+        """Bytes the device holds at address..address+size (0 where never written)."""
+        data = bytearray(size)
+        pos = 0
+        while pos < size:
+            page, offset = divmod(address + pos, self.PAGE)
+            chunk = min(self.PAGE - offset, size - pos)
+            if page in self.pages:
+                data[pos:pos + chunk] = self.pages[page][offset:offset + chunk]
+            pos += chunk
+        return bytes(data)
+
+    def _block(self, block, now_ms):
+        if len(block) < 12:
+            return False
+        address, size = struct.unpack_from('>II', block, 0)
+        if len(block) != 8 + size + 4:
+            return False
+        payload = block[8:8 + size]
+        if struct.unpack_from('>I', block, 8 + size)[0] != crc16(payload):
+            return False
+        self._store(address, payload)
+        self.blocks += 1
+        self.busy_until = now_ms + self.busy_ms
+        return True
+
+    def write(self, data, now_ms):
+        data = bytes(data)
+        if self.block_pending:
+            self.block_pending = False
+            ok = self._block(data, now_ms)
+        elif len(data) >= 8 and data[0] == DDC2BI_SOURCE and data[1] & 0x80:
+            self.commands += 1
+            ok = True
+            if (data[5], data[6]) in DDC2BI_FAST_WRITE:
+                if len(data) == 8:
+                    self.block_pending = True
+                else:
+                    ok = self._block(data[8:], now_ms)
+        else:
+            ok = False
+        self.status = DDC2BI_ACK if ok else DDC2BI_NACK
+        return True
+
+    def read(self, count, now_ms):
+        status = DDC2BI_BUSY if now_ms < self.busy_until else self.status
+        return (status * (count // len(status) + 1))[:count]
+
+
+class SimulatedTransport(I2CTransport):
+    """
+    In-process I2C bus. Devices attached to slave addresses get every
+    transaction; a missing device NACKs (0 bytes, or -I2C_STATUS_SLA_NACK
+    from write_read, as the Aardvark reports it). Time is virtual: each
+    transaction adds its bus time at bitrate plus overhead_ms, delay()
+    adds its ms, so elapsed_ms is the projected time on real hardware.
+    """
+
+    def __init__(self, bitrate=400, overhead_ms=0.0):
+        super().__init__(bitrate)
+        self.overhead_ms = overhead_ms
+        self.devices = {}
+        self.elapsed_ms = 0.0
+        self.transactions = 0
+        self.bytes_written = 0
+        self.bytes_read = 0
+
+    def attach(self, addr, device):
+        self.devices[addr] = device
+        return device
+
+    def open(self):
+        self.is_open = True
+        self.configure()
+
+    def configure(self):
+        return self.bitrate
+
+    def _transaction(self, nbytes):
+        self.transactions += 1
+        self.elapsed_ms += transfer_ms(nbytes, self.bitrate) + self.overhead_ms
+
+    def write(self, addr, data, nostop=False):
+        device = self.devices.get(addr)
+        self._transaction(len(data) if device else 0)
+        if device is None:
+            return 0
+        device.write(data, self.elapsed_ms)
+        self.bytes_written += len(data)
+        return len(data)
+
+    def read(self, addr, count):
+        device = self.devices.get(addr)
+        self._transaction(count if device else 0)
+        if device is None:
+            return 0, b""
+        self.bytes_read += count
+        return count, device.read(count, self.elapsed_ms)
+
+    def write_read(self, addr, data, count):
+        device = self.devices.get(addr)
+        if device is None:
+            self._transaction(0)
+            return -I2C_STATUS_SLA_NACK, b""
+        # One transaction: the repeated start costs a start bit and the address byte again
+        self.transactions += 1
+        self.elapsed_ms += transfer_ms(len(data) + 1 + count, self.bitrate) + self.overhead_ms
+        device.write(data, self.elapsed_ms)
+        self.bytes_written += len(data)
+        self.bytes_read += count
+        return count, device.read(count, self.elapsed_ms)
+
+    def delay(self, ms):
+        self.elapsed_ms += ms
@@ -1,85 +1,190 @@
 ﻿import struct
 import argparse
 import os
+import io
+import mmap
+from contextlib import nullcontext, redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+from crc16 import crc16
+from i2c_batch import BatchWriter, transfer_ms
+
+DDC2BI_ADDR = 0x37
+# DDC2BI packet header for eng=indie and for everyone else
+DDC2BI_HEADER_INDIE = bytes([0x51, 0x85, 0xC2, 0x00, 0x00, 0x03, 0x11, 0x6A])
+DDC2BI_HEADER_CUSTOMER = bytes([0x51, 0x85, 0xC2, 0x00, 0x00, 0x03, 0x10, 0x6B])
+# Unchanged gaps up to one packet's framing (header + addr + size + CRC) are
+# cheaper to resend than to start a new packet for
+DELTA_MERGE_GAP = 20
+# EEPROM defaults: 8-byte pages, 2 ms write cycle (the 1 + 1 ms the batch always slept)
+EEPROM_PAGE_SIZE = 8
+EEPROM_WRITE_CYCLE_MS = 2
+EEPROM_BITRATE = 400
 
 def calculate_crc16(Buf: bytes, W_len: int) -> int:
-    Accum = 0x1021
-    PolDiv = 0x1021
-    for j in range(W_len):
-        DataIn = Buf[j]
-        for _ in range(8):
-            flag = DataIn ^ (Accum >> 8)
-            Accum <<= 1
-
-            if flag & 0x80:
-                Accum ^= PolDiv
-
-            DataIn <<= 1
-            Accum &= 0xFFFF
-    return Accum
+    return crc16(memoryview(Buf)[:W_len])
 
 def get_dynamic_size(data: bytes) -> int:
-    for i in range(len(data) - 1, -1, -1):
-        if data[i] != 0:
-            return i + 1
+    """Length of data without its trailing zero bytes, scanned from the end in 64KB blocks."""
+    data = memoryview(data)
+    block = 1 << 16
+    end = len(data)
+    while end > 0:
+        start = max(0, end - block)
+        used = len(bytes(data[start:end]).rstrip(b"\x00"))
+        if used:
+            return start + used
+        end = start
     return 0
 
-def modify_binary_file(modetype: str, input_file: str, output_file: str, xml_file: str, slave_addr: int = 0x54, chunk_size: int = 1024, engineer: str = "customer"):
+def merge_codepatch(input_file: str) -> bytearray:
+    """
+    CalCrcAndSizeCodePatch: rebuild a code patch as
+    [2 bytes of ConfigHeader] + CRC16 + ConfigLen + code size + ConfigHeader[10:32] + code,
+    where the code is everything after the 32-byte ConfigHeader minus trailing zeros.
+    The input is memory-mapped and the result is built in memory.
+    """
+    with open(input_file, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < 32:
+            raise ValueError("Input data is too short for codepatch operation")
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as original_data:
+            total_size = get_dynamic_size(original_data)
+
+            ConfigHeader = original_data[0:32]
+            ConfigLen = original_data[4:6]
+
+            print(ConfigHeader.hex(' '))
+            
+            print(ConfigLen.hex(' '))
+            
+            code_size = max(0, total_size - 32)
+            CalculatedDataSize = struct.pack('<I', code_size)
+
+            print(f"codepatch size w/o ConfigHeader: {CalculatedDataSize} bytes")
+            
+            modified_data = bytearray(32 + code_size)
+            modified_data[32:] = original_data[32:32 + code_size]
+
+    crc16 = calculate_crc16(memoryview(modified_data)[32:], code_size)
+    modified_data[0:32] = b''.join([
+        ConfigHeader[0:2],
+        struct.pack('>H', crc16),
+        ConfigLen,
+        CalculatedDataSize,
+        ConfigHeader[10:32],
+    ])
+
+    print(f"Crc16Vale: {hex(crc16)}")
+    return modified_data
+
+def ddc2bi_packets(data, physical_addr: int, total_size: int, chunk_size: int, header: bytes):
+    """
+    Frame data[:total_size] into DDC2BI write packets:
+    header + physical address + size + payload + 00 00 + CRC16 of the payload.
+    The last payload is zero-padded to an even length.
+
+    Yields (packet, payload) memoryviews into one reused buffer, so memory stays
+    flat for any input size; write them out before asking for the next packet.
+    """
+    data = memoryview(data)
+    buffer = bytearray(len(header) + 8 + chunk_size + 1 + 4)
+    view = memoryview(buffer)
+    header_size = len(header) + 8
+    buffer[:len(header)] = header
+
+    for start in range(0, total_size, chunk_size):
+        size = min(chunk_size, total_size - start)
+        chunk_data = data[start:start + size]
+        payload_size = len(chunk_data)
+        if size != chunk_size and payload_size % 2 != 0:
+            size += 1
+            buffer[header_size + payload_size] = 0x00
+            payload_size += 1
+
+        struct.pack_into('>II', buffer, len(header), physical_addr, size)
+        payload = view[header_size:header_size + payload_size]
+        payload[:len(chunk_data)] = chunk_data
+        struct.pack_into('>HH', buffer, header_size + payload_size, 0x0000, calculate_crc16(payload, payload_size))
+
+        yield view[:header_size + payload_size + 4], payload
+        physical_addr += chunk_size
+
+def dirty_ranges(new, old, merge_gap: int = DELTA_MERGE_GAP):
+    """
+    (start, size) of every range where new differs from old; bytes past the
+    end of old count as changed. Ranges are widened to an even start and
+    length, and ranges less than merge_gap bytes apart are merged.
+    """
+    new, old = memoryview(new), memoryview(old)
+    size = len(new)
+    ranges = []
+    block = 64
+    for block_start in range(0, size, block):
+        block_end = min(block_start + block, size)
+        if new[block_start:block_end] == old[block_start:block_end]:
+            continue
+        for i in range(block_start, block_end):
+            if i < len(old) and new[i] == old[i]:
+                continue
+            start, end = i & ~1, min((i + 2) & ~1, size + size % 2)
+            if ranges and start - ranges[-1][1] <= merge_gap:
+                ranges[-1][1] = max(ranges[-1][1], end)
+            else:
+                ranges.append([start, end])
+    return [(start, end - start) for start, end in ranges]
+
+def eeprom_page_writes(data, start: int, page_size: int):
+    """Split data for EEPROM address start into (address, data) writes that never cross a page."""
+    pos = 0
+    while pos < len(data):
+        address = start + pos
+        size = min(page_size - address % page_size, len(data) - pos)
+        yield address, data[pos:pos + size]
+        pos += size
+
+def hex_bytes(data) -> str:
+    """'51 85 C2 ...' for a bytes-like object, formatted in C rather than per byte."""
+    return data.hex(' ').upper()
+
+def write_ddc2bi_xml(xml_f, packet, batch=None):
+    """
+    Write one DDC2BI packet as an Aardvark <i2c_write> followed by the ACK read, in one write.
+    The same commands also go to the binary batch file if one is open.
+    """
+    if batch:
+        batch.write(DDC2BI_ADDR, packet)
+        batch.sleep(2)
+        batch.read(DDC2BI_ADDR, 8)
+        batch.sleep(1)
+    xml_f.write(
+        f'<i2c_write addr="{hex(DDC2BI_ADDR)}" count="{len(packet)}" nostop="0" radix="16">\n'
+        f'    {hex_bytes(packet)}\n'
+        f'</i2c_write>\n'
+        f'<sleep ms="2"/>\n'
+        f'<i2c_read addr="{hex(DDC2BI_ADDR)}" count="8"></i2c_read>\n'
+        f'<sleep ms="1"/>\n'
+    )
+
+def modify_binary_file(modetype: str, input_file: str, output_file: str, xml_file: str, slave_addr: int = 0x54, chunk_size: int = 1024, engineer: str = "customer", base_file: str = None, sidecar: bool = False,
+                       eeprom_page: int = EEPROM_PAGE_SIZE, eeprom_twr: int = EEPROM_WRITE_CYCLE_MS, eeprom_start: int = 0x0):
     Product_Data_size = 356
     Config_Data_size = 136
     if engineer == "indie":
-        DDC2BI_header = bytes([0x51, 0x85, 0xC2, 0x00, 0x00, 0x03, 0x11, 0x6A])
+        DDC2BI_header = DDC2BI_HEADER_INDIE
     else:
-        DDC2BI_header = bytes([0x51, 0x85, 0xC2, 0x00, 0x00, 0x03, 0x10, 0x6B])
+        DDC2BI_header = DDC2BI_HEADER_CUSTOMER
         
     physical_addr = 0
+    # Side files (<type>.bin, eepconfig.bin, batch) go next to the output
+    output_dir = os.path.dirname(output_file)
 
-   # CalCrcAndSizeCodePatch process(merge)
+    # CalCrcAndSizeCodePatch process(merge), in memory
     if modetype == "codepatch":
-        
+        original_data = merge_codepatch(input_file)
+    else:
         with open(input_file, 'rb') as f:
             original_data = f.read()
         
-        total_size = get_dynamic_size(original_data)
-        
-        intermediate_file = "codePatchCRC.bin"  
-
-        if len(original_data) < 32:
-            raise ValueError("Input data is too short for codepatch operation")
-
-        ConfigHeader = original_data[0:32]
-        ConfigLen = original_data[4:6]
-
-        print(" ".join(f"{b:02x}" for b in ConfigHeader))
-        
-        print(" ".join(f"{b:02x}" for b in ConfigLen))
-        
-        CalculatedData = original_data[32:total_size]
-        CalculatedDataSize = struct.pack('<I', len(CalculatedData))
-
-        print(f"codepatch size w/o ConfigHeader: {CalculatedDataSize} bytes")
-        
-        crc16 = calculate_crc16(CalculatedData, len(CalculatedData))
-        crc16_bytes = original_data[0:2] + struct.pack('>H', crc16)
-
-        modified_data = b''.join([
-            crc16_bytes,
-            ConfigLen,
-            CalculatedDataSize,
-            ConfigHeader[10:32],
-            CalculatedData
-        ])
-
-        print(f"Crc16Vale: {hex(crc16)}")
-        
-        with open(intermediate_file, 'wb') as f:
-            f.write(modified_data)
-        input_file = intermediate_file    #Update input_file
-
-
-    with open(input_file, 'rb') as f:
-        original_data = f.read()
-        
     total_size = get_dynamic_size(original_data)
     
     if total_size < Config_Data_size:
@@ -105,231 +210,181 @@ def modify_binary_file(modetype: str, input_file: str, output_file: str, xml_fil
         print(f"Size of mtpconfigBin: {Config_Data_size} bytes")
     elif modetype == "eeprom":
         physical_addr = 0x164
-        chunk_size = 8
         total_size = 136
         print(f"Size of configuration data: {Config_Data_size} bytes")
     else:
         raise ValueError("Invalid type. Please choose one of: codepatch, mtpfull, mtpproduct, mtpconfig, eeprom")
 
-    record_data = bytes()
-    non_modified_data = bytes()
-    non_modified_file_name = modetype + ".bin"
-    batch_file_name = "APPSTEST_EEPROM_Updata_script.batch"
-    with open(xml_file, 'w') as xml_f:   
+    if base_file is not None and modetype == "eeprom":
+        raise ValueError("base= is only supported for DDC2BI types, not eeprom")
+    if modetype == "eeprom" and not 0 < eeprom_page <= 0x100:
+        raise ValueError(f"Invalid EEPROM page size {eeprom_page}")
+    if modetype == "eeprom" and eeprom_start + total_size > 0x100:
+        raise ValueError(f"EEPROM data 0x{eeprom_start:02X} + {total_size} bytes does not fit the 8-bit word address")
+
+    non_modified_file_name = os.path.join(output_dir, modetype + ".bin")
+    batch_file_name = os.path.join(output_dir, "APPSTEST_EEPROM_Updata_script.batch")
+    # sidecar: binary batch file (see i2c_batch.py) next to the XML, for replay without XML parsing
+    batch_bin_name = os.path.splitext(xml_file)[0] + ".i2cb"
+    with open(xml_file, 'w', buffering=1 << 16) as xml_f, open(output_file, 'wb') as out_f, \
+            BatchWriter(batch_bin_name) if sidecar else nullcontext() as batch:
         xml_f.write(f'<aardvark>\n')
 
-        if modetype in ["codepatch", "mtpfull"]:
-            num_chunks = total_size // chunk_size
-            remaining_size = total_size % chunk_size
-
-            for i in range(num_chunks):          
-                chunk_data = original_data[i * chunk_size:(i + 1) * chunk_size]
-                
-                DDC2BI_header_with_addr_size = DDC2BI_header + struct.pack('>I', physical_addr) + struct.pack('>I', chunk_size)
-
-                crc16 = calculate_crc16(chunk_data, len(chunk_data))
-                crc16_bytes = bytes([0x00, 0x00]) + struct.pack('>H', crc16)
-                
-                count = len(DDC2BI_header_with_addr_size) + len(chunk_data) + len(crc16_bytes)
-
-                data_with_crc = DDC2BI_header_with_addr_size + chunk_data + crc16_bytes
-                hex_data = " ".join(f"{b:02X}" for b in data_with_crc)
-                xml_f.write(f'<i2c_write addr="0x37" count="{count}" nostop="0" radix="16">\n')
-                xml_f.write(f'    {hex_data}\n')
-                xml_f.write(f'</i2c_write>\n')
-                xml_f.write(f'<sleep ms="2"/>\n')
-                xml_f.write(f'<i2c_read addr="0x37" count="8"></i2c_read>\n')
-                xml_f.write(f'<sleep ms="1"/>\n')
-                
-                record_data += DDC2BI_header_with_addr_size + chunk_data + crc16_bytes
-                
-                physical_addr += chunk_size
-
-            if remaining_size > 0:
-                chunk_data = original_data[num_chunks * chunk_size:num_chunks * chunk_size + remaining_size]
-                
-                if len(chunk_data) % 2 != 0:
-                    remaining_size = remaining_size + 1
-                    chunk_data += bytes([0x00])
-                    
-                DDC2BI_header_with_addr_size = DDC2BI_header + struct.pack('>I', physical_addr) + struct.pack('>I', remaining_size)
-
-                crc16 = calculate_crc16(chunk_data, len(chunk_data))
-                crc16_bytes = bytes([0x00, 0x00]) + struct.pack('>H', crc16)
-
-                count = len(DDC2BI_header_with_addr_size) + len(chunk_data) + len(crc16_bytes)
-
-                data_with_crc = DDC2BI_header_with_addr_size + chunk_data + crc16_bytes
-                hex_data = " ".join(f"{b:02X}" for b in data_with_crc)
-                xml_f.write(f'<i2c_write addr="0x37" count="{count}" nostop="0" radix="16">\n')
-                xml_f.write(f'    {hex_data}\n')
-                xml_f.write(f'</i2c_write>\n')
-                xml_f.write(f'<sleep ms="2"/>\n')
-                xml_f.write(f'<i2c_read addr="0x37" count="8"></i2c_read>\n')
-                xml_f.write(f'<sleep ms="1"/>\n')
-                
-                record_data += DDC2BI_header_with_addr_size + chunk_data + crc16_bytes
-                
-            xml_f.write(f'</aardvark>\n')
-            print(f"XML has been created as {xml_file}")
-
-        elif modetype in ["mtpproduct", "mtpconfig"]:
-            offset = physical_addr - 0x13000
-            num_chunks = total_size // chunk_size
-            remaining_size = total_size % chunk_size
-
-            for i in range(num_chunks):
-                chunk_data = original_data[offset + (i * chunk_size) : offset + ((i + 1) * chunk_size)]
-
-                DDC2BI_header_with_addr_size = DDC2BI_header + struct.pack('>I', physical_addr) + struct.pack('>I', chunk_size)
-
-                crc16 = calculate_crc16(chunk_data, len(chunk_data))
-                crc16_bytes = bytes([0x00, 0x00]) + struct.pack('>H', crc16)
-
-                count = len(DDC2BI_header_with_addr_size) + len(chunk_data) + len(crc16_bytes)
-
-                data_with_crc = DDC2BI_header_with_addr_size + chunk_data + crc16_bytes
-                hex_data = " ".join(f"{b:02X}" for b in data_with_crc)
-                xml_f.write(f'<i2c_write addr="0x37" count="{count}" nostop="0" radix="16">\n')
-                xml_f.write(f'    {hex_data}\n')
-                xml_f.write(f'</i2c_write>\n')
-                xml_f.write(f'<sleep ms="2"/>\n')
-                xml_f.write(f'<i2c_read addr="0x37" count="8"></i2c_read>\n')
-                xml_f.write(f'<sleep ms="1"/>\n')
-                
-                record_data += DDC2BI_header_with_addr_size + chunk_data + crc16_bytes
-                non_modified_data += chunk_data
-            
-                physical_addr += chunk_size
-            
-            if remaining_size > 0:
-                chunk_data = original_data[offset + (num_chunks * chunk_size):offset + (num_chunks * chunk_size) + remaining_size]
-                
-                if len(chunk_data) % 2 != 0:
-                    remaining_size = remaining_size + 1
-                    chunk_data += bytes([0x00])
-                    
-                DDC2BI_header_with_addr_size = DDC2BI_header + struct.pack('>I', physical_addr) + struct.pack('>I', remaining_size)
-                
-                crc16 = calculate_crc16(chunk_data, len(chunk_data))
-                crc16_bytes = bytes([0x00, 0x00]) + struct.pack('>H', crc16)
-                
-                count = len(DDC2BI_header_with_addr_size) + len(chunk_data) + len(crc16_bytes)
-                
-                data_with_crc = DDC2BI_header_with_addr_size + chunk_data + crc16_bytes
-                hex_data = " ".join(f"{b:02X}" for b in data_with_crc)
-                xml_f.write(f'<i2c_write addr="0x37" count="{count}" nostop="0" radix="16">\n')
-                xml_f.write(f'    {hex_data}\n')
-                xml_f.write(f'</i2c_write>\n')
-                xml_f.write(f'<sleep ms="2"/>\n')
-                xml_f.write(f'<i2c_read addr="0x37" count="8"></i2c_read>\n')
-                xml_f.write(f'<sleep ms="1"/>\n')
-                
-                record_data += DDC2BI_header_with_addr_size + chunk_data + crc16_bytes
-                non_modified_data += chunk_data
-                
-            xml_f.write(f'</aardvark>\n')
-            print(f"XML has been created as {xml_file}")
-            
-            with open(non_modified_file_name, 'wb') as non_m_f:
-                non_m_f.write(non_modified_data)
-                
-        elif modetype in ["mtpconfigBin"]:
-            offset = physical_addr - 0x13164
-            num_chunks = total_size // chunk_size
-            remaining_size = total_size % chunk_size
-
-            for i in range(num_chunks):
-                chunk_data = original_data[offset + (i * chunk_size) : offset + ((i + 1) * chunk_size)]
-
-                DDC2BI_header_with_addr_size = DDC2BI_header + struct.pack('>I', physical_addr) + struct.pack('>I', chunk_size)
-
-                crc16 = calculate_crc16(chunk_data, len(chunk_data))
-                crc16_bytes = bytes([0x00, 0x00]) + struct.pack('>H', crc16)
-
-                count = len(DDC2BI_header_with_addr_size) + len(chunk_data) + len(crc16_bytes)
-
-                data_with_crc = DDC2BI_header_with_addr_size + chunk_data + crc16_bytes
-                hex_data = " ".join(f"{b:02X}" for b in data_with_crc)
-                xml_f.write(f'<i2c_write addr="0x37" count="{count}" nostop="0" radix="16">\n')
-                xml_f.write(f'    {hex_data}\n')
-                xml_f.write(f'</i2c_write>\n')
-                xml_f.write(f'<sleep ms="2"/>\n')
-                xml_f.write(f'<i2c_read addr="0x37" count="8"></i2c_read>\n')
-                xml_f.write(f'<sleep ms="1"/>\n')
-
-                record_data += DDC2BI_header_with_addr_size + chunk_data + crc16_bytes
-                non_modified_data += chunk_data
-
-                physical_addr += chunk_size
-
-            if remaining_size > 0:
-                chunk_data = original_data[offset + (num_chunks * chunk_size):offset + (num_chunks * chunk_size) + remaining_size]
-
-                if len(chunk_data) % 2 != 0:
-                    remaining_size = remaining_size + 1
-                    chunk_data += bytes([0x00])
-
-                DDC2BI_header_with_addr_size = DDC2BI_header + struct.pack('>I', physical_addr) + struct.pack('>I', remaining_size)
-
-                crc16 = calculate_crc16(chunk_data, len(chunk_data))
-                crc16_bytes = bytes([0x00, 0x00]) + struct.pack('>H', crc16)
-
-                count = len(DDC2BI_header_with_addr_size) + len(chunk_data) + len(crc16_bytes)
-
-                data_with_crc = DDC2BI_header_with_addr_size + chunk_data + crc16_bytes
-                hex_data = " ".join(f"{b:02X}" for b in data_with_crc)
-                xml_f.write(f'<i2c_write addr="0x37" count="{count}" nostop="0" radix="16">\n')
-                xml_f.write(f'    {hex_data}\n')
-                xml_f.write(f'</i2c_write>\n')
-                xml_f.write(f'<sleep ms="2"/>\n')
-                xml_f.write(f'<i2c_read addr="0x37" count="8"></i2c_read>\n')
-                xml_f.write(f'<sleep ms="1"/>\n')
-
-                record_data += DDC2BI_header_with_addr_size + chunk_data + crc16_bytes
-                non_modified_data += chunk_data
-
-            xml_f.write(f'</aardvark>\n')
-            print(f"XML has been created as {xml_file}")
-
-            with open(non_modified_file_name, 'wb') as non_m_f:
-                non_m_f.write(non_modified_data)
-
-        elif modetype in ["eeprom"]:
+        if modetype in ["eeprom"]:
             config_data = original_data[physical_addr : physical_addr + total_size]
-            regaddr = 0x0
             
-            non_modified_data = config_data
-            with open("eepconfig.bin", 'wb') as non_m_f:
-                non_m_f.write(non_modified_data)
-                
+            with open(os.path.join(output_dir, "eepconfig.bin"), 'wb') as non_m_f:
+                non_m_f.write(config_data)
+
+            # One page write per EEPROM page (a write that crosses a page wraps
+            # inside it), each followed by a single write-cycle sleep
+            writes = 0
+            projected_ms = 0.0
             with open(batch_file_name, 'w') as batch_f: 
-                for i in range(total_size // chunk_size):
-                    data_chunk = config_data[i * chunk_size:(i + 1) * chunk_size]
-                    data_with_addr = struct.pack('>B', regaddr) + config_data[i * chunk_size:(i + 1) * chunk_size]
-                    hex_data = " ".join(f"{b:02X}" for b in data_with_addr)
-                    
-                    xml_f.write(f'<i2c_write addr="{hex(slave_addr)}" count="{chunk_size+1}" nostop="0" radix="16">\n')
-                    xml_f.write(f'    {hex_data}\n')
-                    xml_f.write(f'<sleep ms="1"/>\n')
-                    xml_f.write(f'</i2c_write>\n')
-                    xml_f.write(f'<sleep ms="1"/>\n')
+                for regaddr, data_chunk in eeprom_page_writes(config_data, eeprom_start, eeprom_page):
+                    data_with_addr = struct.pack('>B', regaddr) + data_chunk
+                    xml_f.write(
+                        f'<i2c_write addr="{hex(slave_addr)}" count="{len(data_with_addr)}" nostop="0" radix="16">\n'
+                        f'    {hex_bytes(data_with_addr)}\n'
+                        f'</i2c_write>\n'
+                        f'<sleep ms="{eeprom_twr}"/>\n'
+                    )
+                    if batch:
+                        batch.write(slave_addr, data_with_addr)
+                        batch.sleep(eeprom_twr)
                     
                     batch_data = " ".join(f"0x{byte:02X}" for byte in data_chunk)
-                    batch_f.write(f"AppsTest 31 0x{regaddr:02X} 8 {batch_data}\n")
+                    batch_f.write(f"AppsTest 31 0x{regaddr:02X} {len(data_chunk)} {batch_data}\n")
                     
-                    record_data += struct.pack('>B', regaddr) + config_data[i * chunk_size:(i + 1) * chunk_size]                
-                    regaddr = regaddr + chunk_size
-            
-            xml_f.write(f'</aardvark>\n')
-            print(f"XML has been created as {xml_file}")
+                    out_f.write(data_with_addr)
+                    writes += 1
+                    projected_ms += transfer_ms(len(data_with_addr), EEPROM_BITRATE) + eeprom_twr
+
+            print(f"EEPROM: {writes} page writes (page {eeprom_page} bytes, tWR {eeprom_twr} ms), "
+                  f"projected {projected_ms:.2f} ms at {EEPROM_BITRATE} kHz")
+
+        else:
+            # Offset of the first payload byte in the input file
+            if modetype in ["mtpproduct", "mtpconfig"]:
+                offset = physical_addr - 0x13000
+            elif modetype in ["mtpconfigBin"]:
+                offset = physical_addr - 0x13164
+            else:
+                offset = 0
+
+            image = memoryview(original_data)[offset:]
+            if base_file is None:
+                ranges = [(0, total_size)]
+            else:
+                # Delta mode: only program what differs from the reference image
+                # (same layout as the input, e.g. an earlier bin or a read-back dump)
+                with open(base_file, 'rb') as f:
+                    base_data = f.read()
+                ranges = dirty_ranges(image[:total_size], memoryview(base_data)[offset:offset + total_size])
+                print(f"Delta against {base_file}: {sum(size for _, size in ranges)} of {total_size} bytes in {len(ranges)} range(s)")
+
+            # mtpproduct/mtpconfig/mtpconfigBin also keep the raw payload as <type>.bin
+            keep_payload = modetype not in ["codepatch", "mtpfull"]
+            with open(non_modified_file_name, 'wb') if keep_payload else nullcontext() as non_m_f:
+                for start, size in ranges:
+                    for packet, payload in ddc2bi_packets(image[start:], physical_addr + start, size, chunk_size, DDC2BI_header):
+                        write_ddc2bi_xml(xml_f, packet, batch)
+                        out_f.write(packet)
+                        if non_m_f and base_file is None:
+                            non_m_f.write(payload)
+                if non_m_f and base_file is not None:
+                    non_m_f.write(image[:total_size])
+
+        xml_f.write(f'</aardvark>\n')
+        print(f"XML has been created as {xml_file}")
+        if modetype in ["eeprom"]:
             print(f"Batch file has been created as {batch_file_name}")
-
-    with open(output_file, 'wb') as f:
-        f.write(record_data)
+        if sidecar:
+            print(f"Binary batch file has been created as {batch_bin_name}")
 
     print(f"File has been modified and saved to {output_file}")
 
+def read_manifest(manifest_file: str, base_input: str = None):
+    """
+    Read a batch manifest, one unit per line: 'unit input [offset=hex ...]'.
+    input '-' means the base image (input=). Each offset=hex overrides bytes of
+    the input image at that offset (0x000 = RAM 0x13000 for MTP images), e.g.
+        unit001  -  0x004=1A2B 0x00C=0102
+    '#' starts a comment. Returns [(unit, input file, [(offset, bytes)])].
+    """
+    units = []
+    with open(manifest_file, 'r') as f:
+        for line_no, line in enumerate(f, 1):
+            fields = line.split('#', 1)[0].split()
+            if not fields:
+                continue
+            if len(fields) < 2:
+                raise ValueError(f"{manifest_file}:{line_no}: expected 'unit input [offset=hex ...]'")
+            unit, unit_input = fields[0], fields[1]
+            if unit in (u[0] for u in units):
+                raise ValueError(f"{manifest_file}:{line_no}: duplicate unit {unit}")
+            if unit_input == "-":
+                if base_input is None:
+                    raise ValueError(f"{manifest_file}:{line_no}: '-' needs a base image (input=)")
+                unit_input = base_input
+            overrides = []
+            for override in fields[2:]:
+                try:
+                    offset, value = override.split('=')
+                    overrides.append((int(offset, 16), bytes.fromhex(value)))
+                except ValueError:
+                    raise ValueError(f"{manifest_file}:{line_no}: bad override {override!r}, expected offset=hex")
+            units.append((unit, unit_input, overrides))
+    return units
+
+def _modify_unit(modetype, unit_dir, input_file, overrides, output_name, xml_name, slave_addr, chunk_size, engineer, base_file, sidecar,
+                 eeprom_page, eeprom_twr, eeprom_start):
+    """Batch worker: patch one unit's image and convert it inside unit_dir."""
+    os.makedirs(unit_dir, exist_ok=True)
+    with open(input_file, 'rb') as f:
+        data = bytearray(f.read())
+    for offset, value in overrides:
+        if offset + len(value) > len(data):
+            data.extend(bytes(offset + len(value) - len(data)))
+        data[offset:offset + len(value)] = value
+
+    unit_input = os.path.join(unit_dir, os.path.basename(input_file))
+    with open(unit_input, 'wb') as f:
+        f.write(data)
+
+    # Keep each unit's console output in its own log instead of interleaving
+    log = io.StringIO()
+    with redirect_stdout(log):
+        modify_binary_file(modetype, unit_input, os.path.join(unit_dir, output_name), os.path.join(unit_dir, xml_name), slave_addr, chunk_size, engineer, base_file, sidecar,
+                           eeprom_page, eeprom_twr, eeprom_start)
+    with open(os.path.join(unit_dir, "modify_binary_file.log"), 'w') as f:
+        f.write(log.getvalue())
+
+def modify_binary_files(modetype: str, units, out_dir: str, output_name: str, xml_name: str, slave_addr: int = 0x54, chunk_size: int = 1024, engineer: str = "customer", jobs: int = None, base_file: str = None, sidecar: bool = False,
+                        eeprom_page: int = EEPROM_PAGE_SIZE, eeprom_twr: int = EEPROM_WRITE_CYCLE_MS, eeprom_start: int = 0x0):
+    """
+    Run modify_binary_file for every manifest unit across a process pool, each
+    into out_dir/<unit>. Units are independent, so the files do not depend on
+    jobs or scheduling. Returns {unit: error} for the units that failed.
+    """
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            (unit, pool.submit(_modify_unit, modetype, os.path.join(out_dir, unit), unit_input, overrides,
+                               output_name, xml_name, slave_addr, chunk_size, engineer, base_file, sidecar,
+                               eeprom_page, eeprom_twr, eeprom_start))
+            for unit, unit_input, overrides in units
+        ]
+        failures = {}
+        for unit, future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"{unit}: {e}")
+                failures[unit] = e
+
+    print(f"{len(units) - len(failures)}/{len(units)} units generated in {out_dir}")
+    return failures
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Modify a binary file by adding dynamic byte array and CRC16 checksum based on type.')
 
@@ -345,18 +400,51 @@ if __name__ == "__main__":
 
     modetype = param_dict.get('type', None)
     input_file = param_dict.get('input', None)
-    if input_file is None:
+    manifest_file = param_dict.get('manifest', None)
+    if input_file is None and manifest_file is None:
         raise ValueError("Missing required parameter: input")
     
-    name = input_file.rsplit('.bin', 1)[0]
-    
-    output_file = param_dict.get('output', f"{modetype}{name}_converted.bin")
-    xml_file = param_dict.get('xml', f"{modetype}{name}_batch.xml")
     slave_addr = int(param_dict.get('slaveaddr', '0x54'), 16)
     chunk_size = int(param_dict.get('payload', '1024'))
     engineer = param_dict.get('eng', 'costomer')
-
-    if not all([modetype, input_file]):
+    # base=reference.bin: emit only the ranges that differ from it
+    base_file = param_dict.get('base', None)
+    # sidecar=1: also write <xml name>.i2cb, a binary batch file for AardvarkController
+    sidecar = param_dict.get('sidecar', '0') == '1'
+    # eeprom: page=bytes per page write, twr=write cycle ms, eepaddr=hex start address
+    eeprom_page = int(param_dict.get('page', str(EEPROM_PAGE_SIZE)))
+    eeprom_twr = int(param_dict.get('twr', str(EEPROM_WRITE_CYCLE_MS)))
+    eeprom_start = int(param_dict.get('eepaddr', '0x0'), 16)
+
+    if not modetype:
         raise ValueError("Missing required parameter: type")
 
-    modify_binary_file(modetype, input_file, output_file, xml_file, slave_addr, chunk_size, engineer)
+    if manifest_file:
+        # Batch mode: manifest=units.txt [input=base.bin] [out=dir] [jobs=N]
+        units = read_manifest(manifest_file, input_file)
+        failures = modify_binary_files(
+            modetype,
+            units,
+            param_dict.get('out', '.'),
+            os.path.basename(param_dict.get('output', f"{modetype}_converted.bin")),
+            os.path.basename(param_dict.get('xml', f"{modetype}_batch.xml")),
+            slave_addr,
+            chunk_size,
+            engineer,
+            int(param_dict['jobs']) if 'jobs' in param_dict else None,
+            base_file,
+            sidecar,
+            eeprom_page,
+            eeprom_twr,
+            eeprom_start
+        )
+        if failures:
+            raise SystemExit(1)
+    else:
+        name = input_file.rsplit('.bin', 1)[0]
+
+        output_file = param_dict.get('output', f"{modetype}{name}_converted.bin")
+        xml_file = param_dict.get('xml', f"{modetype}{name}_batch.xml")
+
+        modify_binary_file(modetype, input_file, output_file, xml_file, slave_addr, chunk_size, engineer, base_file, sidecar,
+                           eeprom_page, eeprom_twr, eeprom_start)
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 10:21:47 2026
+
+Benchmark for modify_binary_file: time to generate the converted bin and the
+Aardvark XML for 1K, 32K and 1MB inputs.
+
+Usage:
+    python modify_binary_file_benchmark.py [type=mtpfull] [payload=1024] [repeat=5]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+
+from modify_binary_file_01062025 import hex_bytes, modify_binary_file
+
+SIZES = {"1K": 1 << 10, "32K": 32 << 10, "1MB": 1 << 20}
+
+
+def old_hex_bytes(data) -> str:
+    """The per-byte formatting modify_binary_file used before hex_bytes()."""
+    return " ".join(f"{b:02X}" for b in data)
+
+
+def make_input(path, size, seed=0):
+    """Random non-zero data, so get_dynamic_size sees the whole file."""
+    data = bytes(random.Random(seed).randrange(1, 256) for _ in range(size))
+    with open(path, 'wb') as f:
+        f.write(data)
+    return data
+
+
+def time_call(func, repeat):
+    """Best wall time of repeat calls, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark(modetype="mtpfull", chunk_size=1024, repeat=5):
+    print(f"type={modetype} payload={chunk_size}, best of {repeat}")
+    print(f"{'size':>6} {'generate':>12} {'MB/s':>8} {'xml':>10} {'hex old':>10} {'hex new':>10}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, size in SIZES.items():
+            input_file = os.path.join(tmp_dir, f"input_{name}.bin")
+            output_file = os.path.join(tmp_dir, f"output_{name}.bin")
+            xml_file = os.path.join(tmp_dir, f"batch_{name}.xml")
+            data = make_input(input_file, size)
+
+            def generate():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    modify_binary_file(modetype, input_file, output_file, xml_file, chunk_size=chunk_size, engineer="indie")
+
+            elapsed = time_call(generate, repeat)
+            old_hex = time_call(lambda: old_hex_bytes(data), repeat)
+            new_hex = time_call(lambda: hex_bytes(data), repeat)
+            print(f"{name:>6} {elapsed * 1e3:>10.2f}ms {size / elapsed / 1e6:>8.1f} "
+                  f"{os.path.getsize(xml_file) / 1024:>8.0f}KB {old_hex * 1e3:>8.2f}ms {new_hex * 1e3:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark modify_binary_file for 1K, 32K and 1MB inputs.')
+
+    parser.add_argument('params', nargs='*', help='Input parameters in key=value format: type, payload, repeat')
+
+    args = parser.parse_args()
+
+    param_dict = {}
+    for param in args.params:
+        key, value = param.split('=')
+        param_dict[key.lower()] = value
+
+    benchmark(
+        param_dict.get('type', 'mtpfull'),
+        int(param_dict.get('payload', '1024')),
+        int(param_dict.get('repeat', '5')),
+    )
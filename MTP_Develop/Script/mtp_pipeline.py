@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 14:05:10 2026
+
+Headless MTP Alchemist pipeline: register DB -> MTP_DATA_1K.bin -> Aardvark
+XML -> combined update XML, all in one process (no Tk, no pandas).
+
+Usage:
+    python mtp_pipeline.py db=SiriusA2_MTPRegisterSpecification.db type=mtpfull out=build
+    python mtp_pipeline.py db=lot_0425 type=mtpproduct patch=edits.txt crc=1 eng=indie
+
+db= takes a .db file, a folder of .db files or a glob pattern. Every unit is
+written to its own folder under out= (named after the DB file).
+
+A patch file holds one register edit per line, 'MTP address value' in hex
+(whitespace or '=' separated); '#' starts a comment:
+    7C14 0102030405060708090A   # Unique Serial Number
+    7D66=3F
+"""
+
+import argparse
+import glob
+import math
+import os
+import sqlite3
+
+from crc16 import crc16
+from modify_binary_file_01062025 import modify_binary_file
+from xml_verify import verify_xml
+
+SQL_TABLE = "SiriusA2_MTPRegisterSpecification"
+UPDATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "MTPDATA_update_execute.xml")
+
+MTP_ADDR_BASE = 0x7C00
+MTP_IMAGE_SIZE = 0x400
+MTP_FULL_SIZE = 0x200       # 0x13000 ~ 0x131FF (records + spare)
+PRODUCT_DATA_SIZE = 0x164   # 0x13000 ~ 0x13163
+CONFIG_DATA_SIZE = 0x88     # 0x13164 ~ 0x131EB
+
+# DB sections that make up the MTP map
+MTP_SECTIONS = ("Tracking Data", "ACBIN Data", "DUSR", "Calibration", "OVST Flag", "Configuration")
+
+# CRC fields: (first address, last address, CRC field addresses), in calculation
+# order (the DUSR full-range CRC covers SerNum_CRC at 0x7C1E)
+CRC_RANGES = [
+    (0x7D64, 0x7DE9, (0x7DEA, 0x7DEB)),  # Configuration
+    (0x7C10, 0x7C1D, (0x7C1E,)),         # DUSR ID
+    (0x7C10, 0x7D49, (0x7D4A,)),         # DUSR
+    (0x7D4C, 0x7D5D, (0x7D5E,)),         # Calibration
+    (0x7C00, 0x7C09, (0x7C0A,)),         # Tracking
+]
+
+# type -> (converted bin, Aardvark XML), the names MTP Alchemist has always used
+OUTPUT_NAMES = {
+    "mtpfull": ("MTP_DATA_1K_Converted.bin", "mtp_batch.xml"),
+    "mtpproduct": ("MTP_DATA_1K_ProductConverted.bin", "mtp_Product_batch.xml"),
+    "mtpconfig": ("MTP_DATA_1K_ConfigConverted.bin", "mtp_Config_batch.xml"),
+}
+
+
+def value_bytes(value):
+    """Bytes of a hex 'Value' cell (odd digit counts zero-padded), or b'' if it is empty or not valid hex."""
+    if not isinstance(value, str):
+        return b""
+    digits = "".join(value.split())
+    try:
+        return int(digits, 16).to_bytes((len(digits) + 1) // 2, 'big')
+    except (ValueError, OverflowError):
+        return b""
+
+
+def field_bytes(field_width):
+    """Number of image bytes a register occupies ('0.125' sub-fields share one byte)."""
+    try:
+        return max(1, math.ceil(float(field_width)))
+    except (ValueError, TypeError):
+        return 1
+
+
+class MTPImage:
+    """
+    MTP map (RAM 0x13000 ~ 0x133FF) built from a register DB, or empty if
+    db_path is None (MTP Alchemist fills it from the rows it has loaded).
+    """
+
+    def __init__(self, db_path=None):
+        self.data = bytearray(MTP_IMAGE_SIZE)
+        # 1 for bytes that hold a value
+        self.valid = bytearray(MTP_IMAGE_SIZE)
+        # MTP address -> field width of its first row (DB order)
+        self.widths = {}
+        if db_path is None:
+            return
+
+        connection = sqlite3.connect(db_path)
+        try:
+            rows = connection.execute(
+                f'SELECT "MTP address", "field width", value FROM {SQL_TABLE} '
+                f'WHERE section IN ({", ".join("?" * len(MTP_SECTIONS))}) ORDER BY "index";',
+                MTP_SECTIONS
+            ).fetchall()
+        finally:
+            connection.close()
+
+        for address, field_width, value in rows:
+            try:
+                address = int(address, 16)
+            except (ValueError, TypeError):
+                continue
+            self.widths.setdefault(address, field_width)
+            if value is not None:
+                self.write_field(address, field_width, value)
+
+    def write_field(self, address, field_width, value):
+        """Write a register value into the image, right-aligned in its field width."""
+        offset = address - MTP_ADDR_BASE
+        width = field_bytes(field_width)
+        if not 0 <= offset <= MTP_IMAGE_SIZE - width:
+            return
+        data = value_bytes(value)
+        self.data[offset:offset + width] = data[-width:].rjust(width, b"\x00")
+        self.valid[offset:offset + width] = (b"\x01" if data else b"\x00") * width
+
+    def set_value(self, address, value):
+        """Set the register at an MTP address (hex string value, None clears it)."""
+        if address not in self.widths:
+            raise ValueError(f"No register at MTP address 0x{address:04X}")
+        self.write_field(address, self.widths[address], value)
+
+    def valid_bytes(self, start, end):
+        """
+        Image bytes for MTP addresses start..end (inclusive) that hold a value.
+        Returns a zero-copy memoryview when the whole range is populated.
+        """
+        first, last = start - MTP_ADDR_BASE, end - MTP_ADDR_BASE + 1
+        if self.valid.find(0, first, last) == -1:
+            return memoryview(self.data)[first:last]
+        return bytes(b for b, v in zip(self.data[first:last], self.valid[first:last]) if v)
+
+    def crc_fields(self, start, end, target_addrs):
+        """
+        CRC16 over the valid bytes of start..end (inclusive), split big-endian
+        over the CRC field(s): [(CRC field address, hex value), ...].
+        """
+        crc_data = self.valid_bytes(start, end)
+        if not len(crc_data):
+            raise ValueError("No valid data found for CRC calculation.")
+        crc_value = f"{crc16(crc_data):04X}"
+        digits = len(crc_value) // len(target_addrs)
+        return [(address, crc_value[i * digits:(i + 1) * digits]) for i, address in enumerate(target_addrs)]
+
+    def calculate_crc(self):
+        """Recalculate every CRC field, the same way the GUI's 'Calculate All CRC' does."""
+        for start, end, target_addrs in CRC_RANGES:
+            for address, value in self.crc_fields(start, end, target_addrs):
+                self.set_value(address, value)
+
+    def bin_data(self, modetype):
+        """MTP_DATA_1K.bin contents for a generation type."""
+        if modetype == "mtpfull":
+            return bytes(self.data[:MTP_FULL_SIZE])
+        if modetype == "mtpproduct":
+            return bytes(self.data[:PRODUCT_DATA_SIZE])
+        if modetype == "mtpconfig":
+            return bytes(PRODUCT_DATA_SIZE) + self.data[PRODUCT_DATA_SIZE:PRODUCT_DATA_SIZE + CONFIG_DATA_SIZE]
+        raise ValueError(f"Invalid type. Please choose one of: {', '.join(OUTPUT_NAMES)}")
+
+
+def read_patch(patch_path):
+    """Read a patch file into a list of (MTP address, hex value)."""
+    edits = []
+    with open(patch_path, 'r') as f:
+        for line_no, line in enumerate(f, 1):
+            fields = line.split('#', 1)[0].replace('=', ' ').split()
+            if not fields:
+                continue
+            try:
+                address, value = fields
+                address = int(address, 16)
+                if value.upper().startswith("0X"):
+                    value = value[2:]
+                int(value, 16)
+            except ValueError:
+                raise ValueError(f"{patch_path}:{line_no}: expected 'MTP address value' in hex, got {line.strip()!r}")
+            # Whole bytes, as they are stored in the DB
+            edits.append((address, value.upper().zfill(len(value) + len(value) % 2)))
+    return edits
+
+
+ROOT_OPEN = b"<aardvark>"
+ROOT_CLOSE = b"</aardvark>"
+COPY_BLOCK = 1 << 16
+
+
+def _root_offsets(f):
+    """(end of <aardvark>, start of the last </aardvark>) in a batch XML file."""
+    head = f.read(COPY_BLOCK)
+    start = head.find(ROOT_OPEN)
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    f.seek(max(0, size - COPY_BLOCK))
+    end = f.read().rfind(ROOT_CLOSE)
+    if start == -1 or end == -1:
+        raise ValueError(f"{f.name} is not an Aardvark batch XML")
+    return start + len(ROOT_OPEN), max(0, size - COPY_BLOCK) + end
+
+
+def _copy_range(src, dst, start, end):
+    src.seek(start)
+    while start < end:
+        block = src.read(min(COPY_BLOCK, end - start))
+        if not block:
+            break
+        dst.write(block)
+        start += len(block)
+
+
+def combine_xml(file1_path, Update_File_Path, output_path):
+    """
+    Append the children of the update XML to the generated Aardvark XML.
+    The commands are spliced in as text before the closing </aardvark>, in
+    blocks, so memory stays flat however large the batch is.
+    """
+    with open(file1_path, 'rb') as batch_f, open(Update_File_Path, 'rb') as update_f, \
+            open(output_path, 'wb') as out_f:
+        _, batch_end = _root_offsets(batch_f)
+        update_start, update_end = _root_offsets(update_f)
+        _copy_range(batch_f, out_f, 0, batch_end)
+        _copy_range(update_f, out_f, update_start, update_end)
+        out_f.write(ROOT_CLOSE + b"\n")
+
+
+def generate(image, modetype, out_dir, engineer="indie", chunk_size=1024, update_file=UPDATE_FILE, combined_xml=None):
+    """
+    Write MTP_DATA_1K.bin, the converted bin and the Aardvark XML for an image
+    into out_dir, plus the combined update XML if combined_xml is given.
+    The XML is read back and checked against the bin before it is combined.
+    Returns the path of the last file written.
+    """
+    output_bin, output_xml = OUTPUT_NAMES[modetype]
+    os.makedirs(out_dir, exist_ok=True)
+
+    bin_path = os.path.join(out_dir, "MTP_DATA_1K.bin")
+    with open(bin_path, 'wb') as f:
+        f.write(image.bin_data(modetype))
+
+    xml_path = os.path.join(out_dir, output_xml)
+    modify_binary_file(modetype, bin_path, os.path.join(out_dir, output_bin), xml_path,
+                       chunk_size=chunk_size, engineer=engineer)
+    errors = verify_xml(modetype, bin_path, xml_path)["errors"]
+    if errors:
+        raise ValueError(f"{xml_path} does not match {bin_path}: {errors[0]}")
+    if not combined_xml:
+        return xml_path
+
+    combined_path = os.path.join(out_dir, combined_xml)
+    combine_xml(xml_path, update_file, combined_path)
+    return combined_path
+
+
+def find_databases(pattern):
+    """DB files for a db= argument: a file, a folder of .db files or a glob."""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*.db")
+    return sorted(glob.glob(pattern))
+
+
+def run(db_paths, modetype, out_dir, edits=(), crc=False, engineer="indie", chunk_size=1024, update_file=UPDATE_FILE):
+    """
+    Generate bin + XML + combined XML for every DB, each in out_dir/<DB name>.
+    A unit that fails is reported and skipped. Returns {DB path: error}.
+    """
+    failures = {}
+    for db_path in db_paths:
+        unit = os.path.splitext(os.path.basename(db_path))[0]
+        try:
+            image = MTPImage(db_path)
+            for address, value in edits:
+                image.set_value(address, value)
+            if crc:
+                image.calculate_crc()
+            generate(image, modetype, os.path.join(out_dir, unit), engineer, chunk_size, update_file,
+                     combined_xml=f"Sirius_{modetype}_A2_{unit}.xml")
+        except Exception as e:
+            print(f"{db_path}: {e}")
+            failures[db_path] = e
+    print(f"{len(db_paths) - len(failures)}/{len(db_paths)} units generated in {out_dir}")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate MTP bin and Aardvark XML files from register DBs without the GUI.')
+
+    parser.add_argument('params', nargs='+', help='Input parameters in key=value format: db, type, out, patch, crc, eng, payload, update')
+
+    args = parser.parse_args()
+
+    param_dict = {}
+    for param in args.params:
+        key, value = param.split('=', 1)
+        param_dict[key.lower()] = value
+
+    db_pattern = param_dict.get('db', None)
+    if db_pattern is None:
+        raise ValueError("Missing required parameter: db")
+    db_paths = find_databases(db_pattern)
+    if not db_paths:
+        raise ValueError(f"No DB files found for {db_pattern}")
+
+    modetype = param_dict.get('type', 'mtpfull')
+    if modetype not in OUTPUT_NAMES:
+        raise ValueError(f"Invalid type. Please choose one of: {', '.join(OUTPUT_NAMES)}")
+
+    edits = read_patch(param_dict['patch']) if 'patch' in param_dict else []
+
+    failures = run(
+        db_paths,
+        modetype,
+        param_dict.get('out', '.'),
+        edits,
+        crc=param_dict.get('crc', '0') == '1',
+        engineer=param_dict.get('eng', 'indie'),
+        chunk_size=int(param_dict.get('payload', '1024')),
+        update_file=param_dict.get('update', UPDATE_FILE),
+    )
+    if failures:
+        raise SystemExit(1)
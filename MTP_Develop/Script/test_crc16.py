@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:02:14 2026
+
+Golden-vector tests for crc16 (run with pytest).
+"""
+
+import os
+
+import pytest
+
+from crc16 import CRC16, crc16, crc16_bitwise, crc16_hex, crc16_table
+
+# (input, expected CRC16 with init 0x1021)
+GOLDEN_VECTORS = [
+    (b"", 0x1021),
+    (b"123456789", 0x5E86),
+    (bytes.fromhex("AA5500300000000000020B00000000000000CD059808940080072C00650424003804050085B60207FF0C080C006E"), 0xA6AB),
+]
+
+
+@pytest.mark.parametrize("data, expected", GOLDEN_VECTORS)
+def test_golden_vectors(data, expected):
+    assert crc16(data) == expected
+    assert crc16_table(data) == expected
+    assert crc16_bitwise(data) == expected
+    assert crc16_hex(data.hex(" ")) == expected
+
+
+@pytest.mark.parametrize("data, expected", GOLDEN_VECTORS)
+def test_streaming(data, expected):
+    split = len(data) // 3
+    crc = CRC16().update(data[:split]).update(data[split:])
+    assert crc.crc == expected
+    assert crc.digest() == expected.to_bytes(2, "big")
+    assert crc.hexdigest() == f"{expected:04X}"
+
+
+@pytest.mark.parametrize("size", [1, 2, 255, 1024, 4097])
+def test_implementations_agree(size):
+    data = os.urandom(size)
+    expected = crc16_bitwise(data)
+    assert crc16(data) == expected
+    assert crc16_table(data) == expected
+    assert CRC16(data[:size // 2]).update(data[size // 2:]).crc == expected
+
+
+def test_other_polynomial():
+    # Without 0x1021, crc16 falls back to a table built for the polynomial
+    data = b"123456789"
+    assert crc16(data, 0xFFFF, 0x8005) == crc16_bitwise(data, 0xFFFF, 0x8005)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:52:03 2026
+
+Tests for i2c_transport (run with pytest).
+"""
+
+from types import SimpleNamespace
+
+from i2c_batch import transfer_ms
+from i2c_transport import I2C_STATUS_SLA_NACK, AardvarkTransport, RegisterFile, SimulatedTransport
+
+
+def test_write_read_nack_is_an_error():
+    bus = SimulatedTransport()
+    bus.open()
+    assert bus.write_read(0x50, [0x00], 4) == (-I2C_STATUS_SLA_NACK, b"")
+
+
+def test_simulated_bus_time():
+    bus = SimulatedTransport(bitrate=400, overhead_ms=0.5)
+    bus.attach(0x50, RegisterFile())
+    bus.open()
+    bus.write(0x50, b"\x00\x11\x22")
+    bus.delay(2)
+    assert bus.elapsed_ms == transfer_ms(3, 400) + 0.5 + 2
+    assert (bus.transactions, bus.bytes_written) == (1, 3)
+
+
+def test_aardvark_write_read_status_stays_negative():
+    transport = AardvarkTransport()
+    for status in (I2C_STATUS_SLA_NACK, -1):
+        transport.aa = SimpleNamespace(
+            AA_I2C_NO_FLAGS=0,
+            aa_i2c_write_read=lambda handle, addr, flags, data, count: (status, 0, [], 0),
+        )
+        num_read, data_in = transport.write_read(0x50, [0x00], 4)
+        assert num_read == -abs(status)
+        assert data_in == b""
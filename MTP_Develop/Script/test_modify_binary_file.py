@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:05:12 2026
+
+Tests for modify_binary_file_01062025 (run with pytest from this folder).
+"""
+
+import contextlib
+import io
+import os
+
+import pytest
+
+from i2c_batch import OP_SLEEP, OP_WRITE, read_batch
+from modify_binary_file_01062025 import (DELTA_MERGE_GAP, dirty_ranges, eeprom_page_writes, modify_binary_file,
+                                        modify_binary_files, read_manifest)
+
+MTP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "MTP_DATA_1K.bin")
+
+
+def convert(tmp_path, modetype, input_file, **kwargs):
+    """Run modify_binary_file quietly into tmp_path; returns (output bytes, XML text)."""
+    output_file = str(tmp_path / "out.bin")
+    xml_file = str(tmp_path / "out.xml")
+    with contextlib.redirect_stdout(io.StringIO()):
+        modify_binary_file(modetype, input_file, output_file, xml_file, **kwargs)
+    with open(output_file, 'rb') as f, open(xml_file) as x:
+        return f.read(), x.read()
+
+
+def test_dirty_ranges_merge_within_gap():
+    old = bytes(100)
+    new = bytearray(old)
+    new[4] = 1
+    new[6 + DELTA_MERGE_GAP] = 1
+    assert dirty_ranges(new, old) == [(4, DELTA_MERGE_GAP + 4)]
+
+    new = bytearray(old)
+    new[4] = 1
+    new[8 + DELTA_MERGE_GAP] = 1
+    assert dirty_ranges(new, old) == [(4, 2), (8 + DELTA_MERGE_GAP, 2)]
+
+
+def test_dirty_ranges_pad_odd_ends_to_even():
+    old = bytes(7)
+    new = bytearray(old)
+    new[3] = 1
+    assert dirty_ranges(new, old) == [(2, 2)]
+    new[6] = 1
+    assert dirty_ranges(new, old, merge_gap=0) == [(2, 2), (6, 2)]
+
+
+def test_dirty_ranges_base_of_different_length():
+    new = bytes(range(10))
+    # Bytes past the end of a shorter base count as changed
+    assert dirty_ranges(new, new[:6]) == [(6, 4)]
+    # A longer base is compared over the new image only
+    assert dirty_ranges(new, new + b"\xFF" * 4) == []
+
+
+def test_identical_base_gives_no_packets(tmp_path):
+    output, xml = convert(tmp_path, "mtpfull", MTP_FILE, base_file=MTP_FILE)
+    assert output == b""
+    assert "<i2c_write" not in xml
+
+
+def test_delta_packets_cover_only_changed_bytes(tmp_path):
+    with open(MTP_FILE, 'rb') as f:
+        data = bytearray(f.read())
+    full, _ = convert(tmp_path, "mtpfull", MTP_FILE, chunk_size=64)
+
+    data[0x101] ^= 0xFF
+    changed = str(tmp_path / "changed.bin")
+    with open(changed, 'wb') as f:
+        f.write(data)
+    delta, xml = convert(tmp_path, "mtpfull", changed, chunk_size=64, base_file=MTP_FILE)
+
+    # One packet: 8-byte header, address 0x13100, size 2, the two bytes, 00 00 + CRC
+    assert xml.count("<i2c_write") == 1
+    assert delta[8:16] == bytes.fromhex("00013100 00000002")
+    assert delta[16:18] == data[0x100:0x102]
+    assert len(delta) == 8 + 8 + 2 + 4
+    assert len(delta) < len(full)
+
+
+def test_shorter_base_sends_the_tail(tmp_path):
+    with open(MTP_FILE, 'rb') as f:
+        data = f.read()
+    base = str(tmp_path / "base.bin")
+    with open(base, 'wb') as f:
+        f.write(data[:0x100])
+    full, _ = convert(tmp_path, "mtpfull", MTP_FILE, chunk_size=64)
+    delta, _ = convert(tmp_path, "mtpfull", MTP_FILE, chunk_size=64, base_file=base)
+    assert 0 < len(delta) < len(full)
+    assert delta[8:12] == bytes.fromhex("00013100")
+
+
+def test_eeprom_page_writes_split_at_page_boundaries():
+    data = bytes(range(20))
+    writes = [(address, bytes(chunk)) for address, chunk in eeprom_page_writes(data, 0x00, 8)]
+    assert writes == [(0x00, data[0:8]), (0x08, data[8:16]), (0x10, data[16:20])]
+
+
+def test_eeprom_page_writes_unaligned_start():
+    data = bytes(range(12))
+    writes = [(address, bytes(chunk)) for address, chunk in eeprom_page_writes(data, 0x05, 8)]
+    assert writes == [(0x05, data[0:3]), (0x08, data[3:11]), (0x10, data[11:12])]
+    # No write crosses a page
+    assert all(address // 8 == (address + len(chunk) - 1) // 8 for address, chunk in writes)
+
+
+@pytest.mark.parametrize("start, page", [(0x00, 8), (0x05, 8), (0x03, 16)])
+def test_eeprom_batch_sleeps_twr_after_every_page(tmp_path, start, page):
+    with open(MTP_FILE, 'rb') as f:
+        config = f.read()[0x164:0x164 + 136]
+    output, xml = convert(tmp_path, "eeprom", MTP_FILE, eeprom_start=start, eeprom_page=page, eeprom_twr=5, sidecar=True)
+    expected = list(eeprom_page_writes(config, start, page))
+
+    assert xml.count("<i2c_write") == xml.count('<sleep ms="5"/>') == len(expected)
+    ops = [(op, arg) for op, addr, flags, arg in read_batch(str(tmp_path / "out.i2cb"))]
+    assert [op for op, _ in ops] == [OP_WRITE, OP_SLEEP] * len(expected)
+    assert all(arg == 5 for op, arg in ops if op == OP_SLEEP)
+    assert output == b"".join(bytes([address]) + chunk for address, chunk in expected)
+
+
+def run_manifest(tmp_path, units, out_name, jobs):
+    out_dir = tmp_path / out_name
+    with contextlib.redirect_stdout(io.StringIO()):
+        failures = modify_binary_files("mtpfull", units, str(out_dir), "out.bin", "out.xml", chunk_size=64, jobs=jobs, sidecar=True)
+    outputs = {}
+    for root, _, files in os.walk(out_dir):
+        for name in files:
+            # The log names out_dir, everything else must match exactly
+            if name != "modify_binary_file.log":
+                path = os.path.join(root, name)
+                with open(path, 'rb') as f:
+                    outputs[os.path.relpath(path, out_dir)] = f.read()
+    return failures, outputs
+
+
+def test_read_manifest(tmp_path):
+    manifest = tmp_path / "units.txt"
+    manifest.write_text("# unit input overrides\n"
+                        "unit001  -  0x004=1A2B 0x00C=0102\n"
+                        "\n"
+                        "unit002  other.bin  # no overrides\n")
+    assert read_manifest(str(manifest), "base.bin") == [
+        ("unit001", "base.bin", [(0x004, b"\x1A\x2B"), (0x00C, b"\x01\x02")]),
+        ("unit002", "other.bin", []),
+    ]
+    manifest.write_text("unit001  -  0x004=XYZ\n")
+    with pytest.raises(ValueError, match="bad override"):
+        read_manifest(str(manifest), "base.bin")
+
+
+def test_manifest_outputs_do_not_depend_on_jobs(tmp_path):
+    manifest = tmp_path / "units.txt"
+    manifest.write_text("unit001  -  0x004=1A2B\n"
+                        "unit002  -  0x010=CAFE 0x1F0=01\n")
+    units = read_manifest(str(manifest), MTP_FILE)
+    serial_failures, serial = run_manifest(tmp_path, units, "jobs1", jobs=1)
+    parallel_failures, parallel = run_manifest(tmp_path, units, "jobs2", jobs=2)
+
+    assert serial_failures == parallel_failures == {}
+    assert sorted(serial) == sorted(parallel) == [os.path.join(unit, name) for unit in ("unit001", "unit002")
+                                                   for name in ("MTP_DATA_1K.bin", "out.bin", "out.i2cb", "out.xml")]
+    assert serial == parallel
+    assert serial[os.path.join("unit001", "out.bin")] != serial[os.path.join("unit002", "out.bin")]
+
+
+def test_bad_unit_does_not_abort_the_others(tmp_path):
+    units = [("unit001", MTP_FILE, []),
+             ("missing", str(tmp_path / "missing.bin"), []),
+             ("unit003", MTP_FILE, [(0x004, b"\x1A")])]
+    failures, outputs = run_manifest(tmp_path, units, "out", jobs=2)
+    assert list(failures) == ["missing"]
+    assert isinstance(failures["missing"], FileNotFoundError)
+    assert os.path.join("unit001", "out.bin") in outputs
+    assert os.path.join("unit003", "out.bin") in outputs
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 09:12:40 2026
+
+Tests for mtp_pipeline (run with pytest from this folder).
+"""
+
+import contextlib
+import io
+import os
+import xml.etree.ElementTree as ET
+
+import mtp_pipeline
+from modify_binary_file_01062025 import modify_binary_file
+from mtp_pipeline import MTPImage, value_bytes
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DB_FILE = os.path.join(HERE, os.pardir, "SiriusA2_MTPRegisterSpecification.db")
+MTP_FILE = os.path.join(HERE, "MTP_DATA_1K.bin")
+
+
+def test_value_bytes_odd_length():
+    assert value_bytes("1") == b"\x01"
+    assert value_bytes("123") == b"\x01\x23"
+    assert value_bytes("3F") == b"\x3F"
+    assert value_bytes("") == b""
+    assert value_bytes("XY") == b""
+    assert value_bytes(None) == b""
+
+
+def test_odd_length_value_is_zero_padded_to_field_width():
+    image = MTPImage(DB_FILE)
+    image.set_value(0x7C06, "1")
+    offset = 0x7C06 - mtp_pipeline.MTP_ADDR_BASE
+    assert image.data[offset] == 0x01
+    assert image.valid[offset] == 1
+
+
+def et_combine(file1_path, update_path, output_path):
+    """The ElementTree merge combine_xml replaced, as the reference."""
+    tree1 = ET.parse(file1_path)
+    root1 = tree1.getroot()
+    for child in ET.parse(update_path).getroot():
+        root1.append(child)
+    tree1.write(output_path, encoding="utf-8", xml_declaration=False)
+
+
+def elements(path):
+    return [(e.tag, e.attrib, e.text) for e in ET.parse(path).getroot().iter()]
+
+
+def test_combine_xml_matches_elementtree_merge(tmp_path):
+    batch = str(tmp_path / "batch.xml")
+    with contextlib.redirect_stdout(io.StringIO()):
+        modify_binary_file("mtpfull", MTP_FILE, str(tmp_path / "batch.bin"), batch, chunk_size=16)
+
+    # Double the batch by combining it with itself until it spans several COPY_BLOCKs
+    while os.path.getsize(batch) <= 2 * mtp_pipeline.COPY_BLOCK:
+        doubled = str(tmp_path / f"batch{os.path.getsize(batch)}.xml")
+        mtp_pipeline.combine_xml(batch, batch, doubled)
+        et_combine(batch, batch, doubled + ".et")
+        assert elements(doubled) == elements(doubled + ".et")
+        batch = doubled
+
+    for update in (mtp_pipeline.UPDATE_FILE, batch):
+        mtp_pipeline.combine_xml(batch, update, str(tmp_path / "combined.xml"))
+        et_combine(batch, update, str(tmp_path / "combined_et.xml"))
+        combined = elements(str(tmp_path / "combined.xml"))
+        assert combined == elements(str(tmp_path / "combined_et.xml"))
+        assert len(combined) == len(elements(batch)) + len(elements(update)) - 1
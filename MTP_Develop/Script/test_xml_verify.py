@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:02:51 2026
+
+Tests for xml_verify (run with pytest from this folder).
+"""
+
+import contextlib
+import io
+import os
+
+from modify_binary_file_01062025 import modify_binary_file
+from mtp_pipeline import UPDATE_FILE, combine_xml
+from xml_verify import verify_xml
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+INPUT_FILE = os.path.join(HERE, "MTP_DATA_1K.bin")
+
+
+def make_xml(tmp_path, modetype, chunk_size=128):
+    xml_path = str(tmp_path / "mtp_batch.xml")
+    with contextlib.redirect_stdout(io.StringIO()):
+        modify_binary_file(modetype, INPUT_FILE, str(tmp_path / "converted.bin"), xml_path,
+                           chunk_size=chunk_size, engineer="indie")
+    return xml_path
+
+
+def test_combined_xml_passes(tmp_path):
+    xml_path = make_xml(tmp_path, "mtpfull")
+    combined_path = str(tmp_path / "combined.xml")
+    combine_xml(xml_path, UPDATE_FILE, combined_path)
+
+    plain = verify_xml("mtpfull", INPUT_FILE, xml_path)
+    combined = verify_xml("mtpfull", INPUT_FILE, combined_path)
+    assert combined["errors"] == []
+    assert (combined["writes"], combined["bytes"]) == (plain["writes"], plain["bytes"])
+
+
+def test_corrupt_packet_is_reported(tmp_path):
+    xml_path = make_xml(tmp_path, "mtpproduct")
+    with open(xml_path) as f:
+        text = f.read()
+    # Flip one payload byte of the first packet so its CRC no longer matches
+    start = text.index("51 85 C2 00 00 03 11 6A") + len("51 85 C2 00 00 03 11 6A 00 01 30 00 00 00 00 80 ")
+    byte = int(text[start:start + 2], 16) ^ 0xFF
+    with open(xml_path, "w") as f:
+        f.write(text[:start] + f"{byte:02X}" + text[start + 2:])
+
+    errors = verify_xml("mtpproduct", INPUT_FILE, xml_path)["errors"]
+    assert errors and "CRC" in errors[0]
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 15:48:02 2026
+
+I2C bus time analyzer for Aardvark batch XML made by modify_binary_file.
+
+Adds up every <i2c_write>, <i2c_read> and <sleep> at a given bitrate
+(start + address byte + data bytes, 9 bits each with ACK, + stop) and splits
+the result into payload, DDC2BI framing (header, address, size, CRC),
+read-backs and sleeps. It then searches the DDC2BI payload size that
+programs the same data fastest within the firmware's buffer limit: each
+run of contiguous packets (the whole image, or one dirty range of a delta
+XML) is re-split on its own, and only the read-back, sleeps and host
+turnaround that follow each packet scale with the packet count.
+
+Usage:
+    python xml_bus_time.py xml=mtp_batch.xml [bitrate=400] [overhead=0] [limit=4096]
+
+bitrate is in kHz, overhead is the host turnaround per I2C transaction in ms
+(Aardvark over USB is typically well below 1 ms).
+"""
+
+import argparse
+import struct
+import xml.etree.ElementTree as ET
+
+from i2c_batch import transfer_ms
+from modify_binary_file_01062025 import DDC2BI_ADDR, DDC2BI_HEADER_CUSTOMER, DDC2BI_HEADER_INDIE
+
+DDC2BI_HEADERS = (DDC2BI_HEADER_INDIE, DDC2BI_HEADER_CUSTOMER)
+# Header (8) + physical address (4) + size (4) + 00 00 CRC16 (4)
+DDC2BI_FRAMING = 20
+DDC2BI_HEADER_SIZE = 16
+# FastFlashWrite: BUFFER = 0x1000 is MAX
+FW_BUFFER_LIMIT = 0x1000
+
+
+def parse_batch(xml_file: str):
+    """
+    Yield ('write', addr, count, head), ('read', addr, count, None) or
+    ('sleep', None, ms, None) per batch command. head is the first
+    DDC2BI_HEADER_SIZE data bytes of a write.
+    """
+    for _, elem in ET.iterparse(xml_file, events=("end",)):
+        if elem.tag == "i2c_write":
+            head = bytes.fromhex(" ".join((elem.text or "").split(None, DDC2BI_HEADER_SIZE)[:DDC2BI_HEADER_SIZE]))
+            yield "write", int(elem.get("addr"), 16), int(elem.get("count")), head
+        elif elem.tag == "i2c_read":
+            yield "read", int(elem.get("addr"), 16), int(elem.get("count")), None
+        elif elem.tag == "sleep":
+            yield "sleep", None, float(elem.get("ms")), None
+        elem.clear()
+
+
+def analyze(xml_file: str, bitrate: float = 400, overhead: float = 0.0) -> dict:
+    """
+    Bus time breakdown (ms) and byte counts of a batch XML.
+    Reads, sleeps and host turnaround from a DDC2BI packet up to the next
+    write are counted as that packet's cost (packet_extra_ms). ranges holds
+    the payload bytes of each run of contiguous packets.
+    """
+    report = {
+        "packets": 0, "payload_bytes": 0, "framing_bytes": 0, "other_write_bytes": 0, "other_write_ms": 0.0,
+        "reads": 0, "read_bytes": 0, "sleeps": 0,
+        "write_ms": 0.0, "read_ms": 0.0, "sleep_ms": 0.0, "overhead_ms": 0.0,
+        "packet_write_ms": 0.0, "packet_extra_ms": 0.0, "ranges": [],
+    }
+    in_packet = False
+    next_addr = None
+    for command, addr, count, head in parse_batch(xml_file):
+        if command == "write":
+            write_ms = transfer_ms(count, bitrate)
+            report["write_ms"] += write_ms
+            report["overhead_ms"] += overhead
+            in_packet = (addr == DDC2BI_ADDR and count > DDC2BI_FRAMING
+                         and head[:8] in DDC2BI_HEADERS and len(head) == DDC2BI_HEADER_SIZE)
+            if in_packet:
+                physical_addr, size = struct.unpack_from('>II', head, 8)
+                report["packets"] += 1
+                report["payload_bytes"] += count - DDC2BI_FRAMING
+                report["framing_bytes"] += DDC2BI_FRAMING
+                report["packet_write_ms"] += write_ms
+                report["packet_extra_ms"] += overhead
+                if physical_addr == next_addr:
+                    report["ranges"][-1] += count - DDC2BI_FRAMING
+                else:
+                    report["ranges"].append(count - DDC2BI_FRAMING)
+                next_addr = physical_addr + size
+            else:
+                # e.g. the update/execute commands of a combined XML
+                report["other_write_bytes"] += count
+                report["other_write_ms"] += write_ms
+                next_addr = None
+        elif command == "read":
+            read_ms = transfer_ms(count, bitrate)
+            report["reads"] += 1
+            report["read_bytes"] += count
+            report["read_ms"] += read_ms
+            report["overhead_ms"] += overhead
+            if in_packet:
+                report["packet_extra_ms"] += read_ms + overhead
+        else:
+            report["sleeps"] += 1
+            report["sleep_ms"] += count
+            if in_packet:
+                report["packet_extra_ms"] += count
+    report["total_ms"] = report["write_ms"] + report["read_ms"] + report["sleep_ms"] + report["overhead_ms"]
+    return report
+
+
+def estimate_ms(total_size: int, payload: int, bitrate: float, per_packet_ms: float) -> float:
+    """
+    Bus time to send total_size payload bytes as DDC2BI packets of up to
+    payload bytes (last one padded to even), plus per_packet_ms per packet.
+    """
+    full, remaining = divmod(total_size, payload)
+    time_ms = full * (transfer_ms(payload + DDC2BI_FRAMING, bitrate) + per_packet_ms)
+    if remaining:
+        time_ms += transfer_ms(remaining + remaining % 2 + DDC2BI_FRAMING, bitrate) + per_packet_ms
+    return time_ms
+
+
+def best_payload(report: dict, bitrate: float = 400, limit: int = FW_BUFFER_LIMIT):
+    """
+    Search the even payload sizes up to limit for the fastest way to send the
+    report's payload ranges, each split on its own, keeping the per-packet
+    read-back and sleeps. Everything not tied to a packet (update/execute
+    commands and their read-backs) is a fixed cost.
+    Returns (payload, estimated total ms), the smallest payload on ties.
+    """
+    packets = report["packets"]
+    if not packets:
+        raise ValueError("No DDC2BI packets found")
+    # Read-back, sleeps and host turnaround that every packet pays for
+    per_packet_ms = report["packet_extra_ms"] / packets
+    fixed_ms = report["total_ms"] - report["packet_write_ms"] - report["packet_extra_ms"]
+    largest = max(report["ranges"])
+    candidates = range(2, min(limit, largest + largest % 2) + 1, 2)
+    payload, best_ms = min(((payload, sum(estimate_ms(size, payload, bitrate, per_packet_ms) for size in report["ranges"]))
+                            for payload in candidates),
+                           key=lambda candidate: (round(candidate[1], 6), candidate[0]))
+    return payload, best_ms + fixed_ms
+
+
+def print_report(xml_file: str, bitrate: float = 400, overhead: float = 0.0, limit: int = FW_BUFFER_LIMIT):
+    report = analyze(xml_file, bitrate, overhead)
+    total_ms = report["total_ms"]
+
+    print(f"{xml_file} @ {bitrate:g} kHz, {overhead:g} ms per transaction")
+    print(f"  DDC2BI packets : {report['packets']} in {len(report['ranges'])} range(s), "
+          f"payload {report['payload_bytes']} bytes, framing {report['framing_bytes']} bytes")
+    if report["other_write_bytes"]:
+        print(f"  other writes   : {report['other_write_bytes']} bytes")
+    print(f"  writes         : {report['write_ms']:10.2f} ms")
+    print(f"  read-backs     : {report['read_ms']:10.2f} ms ({report['reads']} x, {report['read_bytes']} bytes)")
+    print(f"  sleeps         : {report['sleep_ms']:10.2f} ms ({report['sleeps']} x)")
+    print(f"  host overhead  : {report['overhead_ms']:10.2f} ms")
+    print(f"  total          : {total_ms:10.2f} ms")
+    if total_ms and report["payload_bytes"]:
+        print(f"  effective rate : {report['payload_bytes'] / total_ms:10.2f} payload bytes/ms")
+
+    if report["packets"]:
+        payload, best_ms = best_payload(report, bitrate, limit)
+        print(f"  best payload   : payload={payload} (limit {limit}) -> {best_ms:.2f} ms, "
+              f"{total_ms - best_ms:.2f} ms saved")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Estimate I2C bus time of an Aardvark batch XML and the best DDC2BI payload size.')
+
+    parser.add_argument('params', nargs='+', help='Input parameters in key=value format: xml, bitrate, overhead, limit')
+
+    args = parser.parse_args()
+
+    param_dict = {}
+    for param in args.params:
+        key, value = param.split('=')
+        param_dict[key.lower()] = value
+
+    xml_file = param_dict.get('xml', None)
+    if xml_file is None:
+        raise ValueError("Missing required parameter: xml")
+
+    print_report(
+        xml_file,
+        float(param_dict.get('bitrate', '400')),
+        float(param_dict.get('overhead', '0')),
+        int(param_dict.get('limit', str(FW_BUFFER_LIMIT)), 0),
+    )
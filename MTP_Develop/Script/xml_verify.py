@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Oct 22 10:06:44 2026
+
+Round-trip check for the Aardvark batch XML made by modify_binary_file.
+
+Decodes every <i2c_write>, checks each DDC2BI packet (header, physical
+address, size, 00 00 + CRC16 of the payload), writes the payloads into a
+sparse image and compares it with the input bin the XML was made from.
+eeprom XML is checked the same way from its word address + data writes.
+
+Usage:
+    python xml_verify.py type=mtpfull input=MTP_DATA_1K.bin xml=mtp_batch.xml
+    python xml_verify.py type=codepatch input=patch.bin xml=cp_batch.xml delta=1
+    python xml_verify.py type=eeprom input=MTP_DATA_1K.bin xml=eep_batch.xml [eepaddr=0x00]
+
+delta=1 is for XML made with base=: only the written bytes are compared,
+the rest of the data does not have to be covered.
+"""
+
+import argparse
+import contextlib
+import io
+import re
+import struct
+
+from crc16 import crc16
+from modify_binary_file_01062025 import (DDC2BI_ADDR, DDC2BI_HEADER_CUSTOMER, DDC2BI_HEADER_INDIE,
+                                         get_dynamic_size, merge_codepatch)
+
+DDC2BI_HEADERS = (DDC2BI_HEADER_INDIE, DDC2BI_HEADER_CUSTOMER)
+DDC2BI_HEADER_SIZE = 8 + 8  # header + physical address + size
+# Header bytes 5, 6: fast write opcodes, the only DDC2BI commands that carry data
+DDC2BI_FAST_WRITE = ((0x03, 0x10), (0x03, 0x11))
+
+# type -> (physical address of input offset 0, physical address and size of the data),
+# the same layout modify_binary_file uses; size None = input without trailing zeros
+LAYOUTS = {
+    "codepatch": (0x300000, 0x300000, None),
+    "mtpfull": (0x13000, 0x13000, None),
+    "mtpproduct": (0x13000, 0x13000, 356),
+    "mtpconfig": (0x13000, 0x13164, 136),
+    "mtpconfigBin": (0x13164, 0x13164, 136),
+    "eeprom": (0x0, 0x164, 136),
+}
+
+I2C_WRITE = re.compile(r'<i2c_write addr="(0x[0-9A-Fa-f]+)" count="(\d+)"[^>]*>([^<]*)')
+
+
+def read_writes(xml_file: str):
+    """Yield (slave address, data) for every <i2c_write> of a batch XML."""
+    with open(xml_file, 'r') as f:
+        text = f.read()
+    for match in I2C_WRITE.finditer(text):
+        addr, count, data = match.groups()
+        data = bytes.fromhex(data)
+        if len(data) != int(count):
+            raise ValueError(f"{xml_file}: <i2c_write> count={count} but {len(data)} data bytes")
+        yield int(addr, 16), data
+
+
+def ddc2bi_payload(packet):
+    """(physical address, payload) of a DDC2BI packet, or ValueError if it is malformed."""
+    if len(packet) < DDC2BI_HEADER_SIZE + 4:
+        raise ValueError(f"packet of {len(packet)} bytes is too short")
+    if bytes(packet[:8]) not in DDC2BI_HEADERS:
+        raise ValueError(f"unknown DDC2BI header {packet[:8].hex(' ').upper()}")
+    physical_addr, size = struct.unpack_from('>II', packet, 8)
+    if DDC2BI_HEADER_SIZE + size + 4 != len(packet):
+        raise ValueError(f"size {size} does not match a {len(packet)} byte packet")
+    payload = packet[DDC2BI_HEADER_SIZE:DDC2BI_HEADER_SIZE + size]
+    pad, crc = struct.unpack_from('>HH', packet, DDC2BI_HEADER_SIZE + size)
+    if pad != 0 or crc != crc16(payload):
+        raise ValueError(f"CRC {crc:04X} != {crc16(payload):04X} at 0x{physical_addr:X}")
+    return physical_addr, payload
+
+
+def load_input(modetype: str, input_file: str):
+    """The data modify_binary_file frames for a type (merged, for a code patch)."""
+    if modetype == "codepatch":
+        with contextlib.redirect_stdout(io.StringIO()):
+            return bytes(merge_codepatch(input_file))
+    with open(input_file, 'rb') as f:
+        return f.read()
+
+
+def verify_xml(modetype: str, input_file: str, xml_file: str, delta: bool = False, eeprom_start: int = 0x0) -> dict:
+    """
+    Rebuild the image written by xml_file and compare it with input_file.
+    Returns a report dict; report["errors"] is empty when the XML is good.
+    """
+    if modetype not in LAYOUTS:
+        raise ValueError(f"Invalid type. Please choose one of: {', '.join(LAYOUTS)}")
+    base_addr, start_addr, size = LAYOUTS[modetype]
+    if modetype == "eeprom":
+        # EEPROM word address eeprom_start holds input offset 0x164
+        base_addr = eeprom_start - start_addr
+        start_addr = eeprom_start
+
+    source = load_input(modetype, input_file)
+    if size is None:
+        size = get_dynamic_size(source)
+    start = start_addr - base_addr
+    end = start + size
+    # The last DDC2BI payload is padded to an even length
+    expected = bytearray(end + 1)
+    expected[:min(len(source), end)] = source[:end]
+    image = bytearray(len(expected))
+    written = bytearray(len(expected))
+
+    report = {"writes": 0, "bytes": 0, "errors": []}
+    errors = report["errors"]
+    for index, (addr, data) in enumerate(read_writes(xml_file)):
+        try:
+            if modetype == "eeprom":
+                if addr == DDC2BI_ADDR or not data:
+                    raise ValueError(f"unexpected write to 0x{addr:02X}")
+                physical_addr, payload = data[0], memoryview(data)[1:]
+            elif addr == DDC2BI_ADDR and (len(data) < 7 or (data[5], data[6]) in DDC2BI_FAST_WRITE):
+                physical_addr, payload = ddc2bi_payload(memoryview(data))
+            else:
+                # update/execute commands of a combined XML
+                continue
+            offset = physical_addr - base_addr
+            if offset < start or offset + len(payload) > len(image):
+                raise ValueError(f"{len(payload)} bytes at 0x{physical_addr:X} are outside the data")
+            if any(written[offset:offset + len(payload)]):
+                raise ValueError(f"0x{physical_addr:X} is written twice")
+        except ValueError as e:
+            errors.append(f"write {index}: {e}")
+            continue
+        image[offset:offset + len(payload)] = payload
+        written[offset:offset + len(payload)] = b"\x01" * len(payload)
+        report["writes"] += 1
+        report["bytes"] += len(payload)
+
+    # Diff only where the XML wrote, plus the data range unless it is a delta
+    if not delta:
+        missing = written.find(0, start, end)
+        if missing != -1:
+            errors.append(f"0x{base_addr + missing:X} is not written ({report['bytes']} of {size} bytes covered)")
+    if image != expected:
+        for offset in range(start, len(image)):
+            if written[offset] and image[offset] != expected[offset]:
+                errors.append(f"0x{base_addr + offset:X}: XML writes {image[offset]:02X}, input has {expected[offset]:02X}")
+                break
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Check that an Aardvark batch XML writes back exactly the input bin.')
+
+    parser.add_argument('params', nargs='+', help='Input parameters in key=value format: type, input, xml, delta, eepaddr')
+
+    args = parser.parse_args()
+
+    param_dict = {}
+    for param in args.params:
+        key, value = param.split('=')
+        param_dict[key.lower()] = value
+
+    for key in ('type', 'input', 'xml'):
+        if key not in param_dict:
+            raise ValueError(f"Missing required parameter: {key}")
+
+    report = verify_xml(
+        param_dict['type'],
+        param_dict['input'],
+        param_dict['xml'],
+        param_dict.get('delta', '0') == '1',
+        int(param_dict.get('eepaddr', '0x0'), 16),
+    )
+    for error in report["errors"]:
+        print(f"ERROR {error}")
+    print(f"{param_dict['xml']}: {report['writes']} writes, {report['bytes']} bytes, "
+          f"{'OK' if not report['errors'] else 'FAILED'}")
+    if report["errors"]:
+        raise SystemExit(1)